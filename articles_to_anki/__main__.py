@@ -0,0 +1,6 @@
+"""Allows running the tool with ``python -m articles_to_anki``."""
+
+from articles_to_anki.cli import main
+
+if __name__ == "__main__":
+    main()
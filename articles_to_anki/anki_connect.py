@@ -0,0 +1,58 @@
+from typing import Any, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from articles_to_anki.config import ANKICONNECT_URL
+
+# Optional: faster serialization of large addNotes payloads (and their responses) when orjson is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# One keep-alive connection to AnkiConnect for the whole run instead of a new
+# connection (and connection pool) per request. Everything goes to a single host,
+# and Anki handles requests one at a time, so a small pool is enough.
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+
+def post(payload: Dict[str, Any], timeout: float = 30) -> requests.Response:
+    """
+    Sends an action to AnkiConnect over the shared session.
+
+    Args:
+        payload (Dict[str, Any]): The AnkiConnect request, with "action", "version" and optional "params".
+        timeout (float): Seconds to wait for Anki to respond.
+
+    Returns:
+        requests.Response: The raw HTTP response.
+    """
+    if orjson is None:
+        return _session.post(ANKICONNECT_URL, json=payload, timeout=timeout)
+    return _session.post(
+        ANKICONNECT_URL,
+        data=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+        timeout=timeout,
+    )
+
+
+def parse(response: requests.Response) -> Dict[str, Any]:
+    """
+    Decodes an AnkiConnect response body.
+
+    Args:
+        response (requests.Response): A response returned by post.
+
+    Returns:
+        Dict[str, Any]: The decoded response, with "result" and "error".
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            # Let requests raise its own error type, which callers already handle
+            pass
+    return response.json()
@@ -1,12 +1,414 @@
+import functools
 import hashlib
+import json
 import os
-from typing import Optional, List, Dict, Any
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple, Union, TYPE_CHECKING
 
 import requests
-from bs4 import BeautifulSoup
-from readability import Document
-import pymupdf
-from articles_to_anki.config import MODEL, client, get_processed_articles, save_processed_articles
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
+from articles_to_anki.config import GENERATION_WORKERS, MODEL, MAX_ARTICLE_TOKENS, MULTI_ARTICLE_MAX_TOKENS, get_client, get_processed_articles, save_processed_articles
+from articles_to_anki.rate_limit import acquire_rate_limits, call_with_backoff
+from articles_to_anki.card_cache import generation_cache_key, load_generated_output, save_generated_output
+
+if TYPE_CHECKING:
+    from articles_to_anki.card_cache import SemanticCardCache
+
+# Optional: compress cached articles when zstandard is installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Optional: exact token counts when tiktoken is installed
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+CARD_PROMPT = """
+You are a spaced repetition tutor creating Anki flashcards from an article the user provides.
+
+Your task is to extract key ideas and present each one using the optimal flashcard format. For each distinct concept, choose either cloze or basic format based on what works best for that specific type of information.
+
+Card Format Selection Guidelines:
+
+Use CLOZE format for:
+- Main arguments and key supporting claims where the structure and context matter
+- Conceptual relationships where seeing the full sentence helps understanding
+- Complex ideas that benefit from partial context cues
+- Individual key terms or concepts that benefit from contextual understanding
+
+Use BASIC format for:
+- Clear definitions where a simple question-answer works best
+- Specific facts, statistics, or data points
+- Direct cause-effect relationships that can be asked simply
+- Terminology where the definition is the focus
+
+Card Creation Rules:
+- Prioritize QUALITY over quantity - create only cards that test meaningful, important concepts
+- Generate cards flexibly based on content richness, not a fixed ratio to word count
+- Each card should test a unique, distinct concept—avoid redundancy between cloze and basic cards
+- For cloze cards: Create SEPARATE cards for each concept, with only 1-3 cloze deletions per card maximum
+- Break down complex sentences into multiple simpler cloze cards if they contain multiple key concepts
+- NEVER create a single cloze card with more than 3 deletions - split into multiple cards instead
+- Each cloze card should focus on one main idea or concept, not multiple unrelated concepts
+- For basic cards: Use simple, direct questions with clear, short answers
+- Focus on the core reasoning, main arguments, and key definitions—AVOID trivial details, specific examples, dates, names, or incidental facts
+- Skip concepts that are too obvious, too specific, or unlikely to be useful for understanding the main ideas
+- Before creating each card, check if you've already covered the same concept in a different way
+- If an idea could work as either format, choose the one that makes the concept clearest and most memorable
+
+Content Guidelines:
+- Identify the main argument (central thesis) and key supporting claims - prioritize these heavily
+- Extract meaningful definitions, distinctions, or relationships the author establishes
+- Focus on concepts that would be useful to remember weeks or months later
+- If the argument is implicit, infer the author's main points
+- Skip minor supporting details, specific examples, anecdotes, or background context unless essential
+- Avoid creating multiple cards that test essentially the same knowledge in different ways
+- It's better to create 3-5 excellent cards than 10+ mediocre or overlapping cards
+- Quality threshold: Each card should test knowledge someone would benefit from remembering weeks later
+- Avoid creating cards for:
+  * Specific examples, anecdotes, or illustrations (unless they ARE the main point)
+  * Dates, names, locations, or other trivia (unless central to the argument)
+  * Quotes or citations (unless the quote itself is a key concept)
+  * Obvious or universally known information
+  * Supporting details that don't contribute to core understanding
+  * Obvious statements or common knowledge
+  * Redundant concepts already covered by other cards
+- Ask yourself: "Does this card test understanding of a key concept that someone should remember?"
+
+Output Format:
+- Begin with the line CLOZE, then list all cloze cards
+- Then write BASIC, and list all basic cards
+- Format each card using semicolons:
+  - Cloze: {{c1::clozed phrase}} or {{c1::phrase1}} and {{c2::phrase2}} (max 3 deletions)
+  - Basic: Question ; Answer
+- Create multiple separate cloze cards rather than one card with many deletions
+- Each line should be one complete card testing one focused concept
+- Use ONLY the separators shown above - no extra semicolons or spaces
+- IMPORTANT: Replace any semicolons (;) in the original text content with commas (,) to avoid confusion with card format separators
+
+Example of CORRECT multi-card approach:
+CLOZE
+{{c1::Traditional Rationality}} is phrased as social rules, with violations interpretable as {{c2::cheating}}.
+To {{c1::Bayesians}}, the brain is an {{c2::engine of accuracy}}.
+The problem of {{c1::Occam's Razor}} suggests that if two hypotheses fit the same observations equally well, why believe the simpler one is more likely to be true?
+
+Example of INCORRECT approach (DON'T DO THIS):
+{{c1::Traditional Rationality}} is phrased as social rules, with violations interpretable as {{c2::cheating}}: if you break the rules and no one else is doing so, you're the first to defect—making you a bad, bad person. To {{c3::Bayesians}}, the brain is an engine of accuracy: if you violate the laws of rationality, the engine doesn't run, and this is equally true whether anyone else breaks the rules or not. The problem of {{c4::Occam's Razor}} suggests that if two hypotheses fit the same observations equally well, why believe the simpler one is more likely to be true?
+
+- Output only the formatted cards. No explanations, preambles, or summaries.
+"""
+
+# The base prompt is sent as the system message, byte-identical on every request, so
+# OpenAI's automatic prompt caching can reuse it; per-request content goes after it.
+_SYSTEM_PROMPT = CARD_PROMPT.strip()
+_INSTRUCTIONS_HEADER = "Additional instructions:\n"
+_ARTICLE_HEADER = "Article Content:\n"
+
+# Sampling temperature for card generation
+_TEMPERATURE = 0.7
+
+# Rough allowance for the prompt and the generated cards on top of the article text
+_PROMPT_AND_OUTPUT_TOKENS = 1500
+
+# Line breaks together with surrounding whitespace and any blank lines, so one substitution
+# both strips every line and drops the empty ones
+_BLANK_LINES = re.compile(r"(?:[^\S\n]*\n)+\s*")
+
+# Minimum text length for the <article>/<main> fast path to be trusted over readability
+_MIN_MAIN_ELEMENT_CHARS = 500
+
+# Structured output for --json-output: replaces the CLOZE/BASIC text format and its parsing
+CARD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "cloze": {"type": "array", "items": {"type": "string"}},
+        "basic": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"front": {"type": "string"}, "back": {"type": "string"}},
+                "required": ["front", "back"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["cloze", "basic"],
+    "additionalProperties": False,
+}
+
+JSON_OUTPUT_INSTRUCTIONS = (
+    "Instead of the CLOZE/BASIC text format, return the cards as JSON: "
+    '"cloze" lists the cloze card texts and "basic" lists the basic cards as objects with "front" and "back".'
+)
+
+# Sentence boundaries, for splitting paragraphs that exceed a part's token budget
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+MERGE_CARDS_PROMPT = """
+The cards below were generated separately from consecutive parts of one long article.
+Merge them into a single set: remove cards that duplicate or overlap with another card, keep the clearest version of each concept, and keep every card in its original format.
+Output a CLOZE section followed by a BASIC section, exactly as in the instructions above.
+
+Cards:
+"""
+
+# The same for --json-output, where both the part outputs and the merged cards are JSON
+MERGE_JSON_CARDS_PROMPT = """
+The cards below were generated separately from consecutive parts of one long article, as one JSON object per part.
+Merge them into a single set: remove cards that duplicate or overlap with another card, keep the clearest version of each concept, and keep every card in its original type.
+Return the merged cards as one JSON object in the same schema.
+
+Cards:
+"""
+
+# Marks where the middle of an over-long article was cut out
+_TRUNCATION_MARKER = "\n[...]\n"
+
+# Per-article blocks in the output of a multi-article request
+_OUTPUT_DELIMITER = re.compile(r"^\s*===\s*OUTPUT\s+(\d+)\s*===\s*$", re.MULTILINE | re.IGNORECASE)
+
+MULTI_ARTICLE_INSTRUCTIONS = """
+The content below contains {count} separate articles, each starting with a line of the form ===ARTICLE N: title===.
+Create cards for each article independently. Start the output for each article with a line ===OUTPUT N=== using the article's number, followed by its CLOZE and BASIC sections.
+"""
+
+# Comment sections (id or class containing "comment", case-insensitively) plus script and
+# style elements, whose text isn't part of the article
+_NON_CONTENT_XPATH = etree.XPath(
+    'descendant-or-self::*[contains(translate(@id, "COMENT", "coment"), "comment")'
+    ' or contains(translate(@class, "COMENT", "coment"), "comment")]'
+    ' | .//script | .//style | .//noscript'
+)
+
+# Section headers in generated output; matched at line start without uppercasing each line
+_SECTION_HEADER = re.compile(r"(CLOZE|BASIC)", re.IGNORECASE)
+# The same headers as whole lines of a complete output, for splitting it in one pass
+_SECTION_SPLIT = re.compile(r"^[^\S\n]*(CLOZE|BASIC).*$", re.IGNORECASE | re.MULTILINE)
+
+# Cache-Control directives that decide how long a fetched page may be reused without revalidation
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+_NO_CACHE = re.compile(r"\b(?:no-cache|no-store)\b", re.IGNORECASE)
+
+# Frame header of zstd-compressed cache files
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Reused for every article fetch so connections to the same host are kept alive. Transient
+# server errors and 429s are retried with backoff, honouring Retry-After.
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+    ),
+)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+_session.headers.update({
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/113.0.0.0 Safari/537.36"
+    )
+})
+
+
+@functools.lru_cache(maxsize=8)
+def _user_prompt_prefix(custom_prompt: Optional[str], header: str = _ARTICLE_HEADER) -> str:
+    """
+    Returns the part of the user message that precedes the article text.
+
+    It only depends on the custom prompt, which is the same for every article in
+    a run, so it is built once instead of per request.
+
+    Args:
+        custom_prompt (Optional[str]): Additional instructions to modify the base prompt.
+        header (str): What follows the instructions, e.g. the merge prompt instead of the article header.
+
+    Returns:
+        str: The custom instructions, if any, followed by the header.
+    """
+    if custom_prompt and custom_prompt.strip():
+        return _INSTRUCTIONS_HEADER + custom_prompt.strip() + "\n\n" + header
+    return header
+
+
+def _url_cache_key(url: str) -> str:
+    """
+    Returns the filename-safe cache key for a URL.
+
+    The key only has to avoid collisions between URLs, not resist attackers, so a
+    128-bit BLAKE2b digest is used instead of SHA-256.
+    """
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_meta(headers: Any) -> Dict[str, Any]:
+    """
+    Extracts what the article cache keeps from a response's headers.
+
+    Besides the ETag/Last-Modified validators, a Cache-Control max-age is turned into
+    an absolute "fresh_until" time, during which the cached copy is used without
+    asking the server at all.
+    """
+    fresh_until = None
+    cache_control = headers.get("Cache-Control") or ""
+    if not _NO_CACHE.search(cache_control):
+        max_age = _MAX_AGE.search(cache_control)
+        if max_age:
+            # Age says how long the response already sat in upstream caches
+            age = headers.get("Age") or "0"
+            fresh_until = time.time() + int(max_age.group(1)) - (int(age) if age.isdigit() else 0)
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "fresh_until": fresh_until,
+    }
+
+
+def _write_cache_meta(meta_path: str, meta: Dict[str, Any]) -> None:
+    """Stores the validators and freshness of a cached article."""
+    try:
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    except IOError as e:
+        print(f"Error saving {meta_path}: {e}")
+
+
+def _migrate_legacy_cache_entry(cache_dir: str, url: str, url_hash: str) -> None:
+    """
+    Renames a cache entry stored under the old SHA-256 key so it keeps being used.
+    """
+    legacy_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    for extension in (".txt", ".json"):
+        legacy_path = os.path.join(cache_dir, f"{legacy_hash}{extension}")
+        new_path = os.path.join(cache_dir, f"{url_hash}{extension}")
+        if os.path.exists(legacy_path) and not os.path.exists(new_path):
+            try:
+                os.replace(legacy_path, new_path)
+            except OSError:
+                pass
+
+
+def _read_cache_entry(cache_dir: str, url_hash: str) -> Optional[tuple[str, str, str]]:
+    """
+    Reads a cached article, compressed or plain.
+
+    Returns:
+        Optional[tuple[str, str, str]]: The cache file path, title, and text, or None if nothing usable is cached.
+    """
+    for extension in (".zst", ".txt"):
+        cache_path = os.path.join(cache_dir, f"{url_hash}{extension}")
+        if not os.path.exists(cache_path):
+            continue
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+            if data.startswith(_ZSTD_MAGIC):
+                if zstandard is None:
+                    continue
+                data = zstandard.ZstdDecompressor().decompress(data)
+        except Exception as e:
+            print(f"Error reading cached article {cache_path}: {e}")
+            continue
+        title, _, text = data.decode("utf-8").replace("\r\n", "\n").partition("\n")
+        if title.strip() or text.strip():
+            return cache_path, title.strip(), text.strip()
+    return None
+
+
+def _write_cache_entry(cache_dir: str, url_hash: str, title: str, text: str) -> None:
+    """
+    Writes an article to the cache, zstd-compressed when zstandard is installed.
+    """
+    data = (title + "\n" + text).encode("utf-8")
+    if zstandard is not None:
+        # Compressor objects aren't thread-safe, and articles are fetched concurrently
+        data = zstandard.ZstdCompressor(level=3).compress(data)
+        cache_path = os.path.join(cache_dir, f"{url_hash}.zst")
+        stale_path = os.path.join(cache_dir, f"{url_hash}.txt")
+    else:
+        cache_path = os.path.join(cache_dir, f"{url_hash}.txt")
+        stale_path = os.path.join(cache_dir, f"{url_hash}.zst")
+    with open(cache_path, "wb") as f:
+        f.write(data)
+    if os.path.exists(stale_path):
+        os.remove(stale_path)
+
+
+def _find_main_element(page: Union[str, bytes]) -> Optional[tuple[str, lxml.html.HtmlElement]]:
+    """
+    Finds the largest <article> or <main> element of a page with lxml.
+
+    Returns:
+        Optional[tuple[str, lxml.html.HtmlElement]]: The page title and the element, or None if the page has neither element.
+    """
+    try:
+        tree = lxml.html.fromstring(page)
+    except (etree.ParserError, ValueError):
+        return None
+    candidates = tree.xpath("//article | //main")
+    if not candidates:
+        return None
+    main = max(candidates, key=lambda element: len(element.text_content()))
+    from readability.htmls import shorten_title
+
+    return shorten_title(tree), main
+
+
+def _html_to_text(main: lxml.html.HtmlElement) -> str:
+    """
+    Extracts readable text from the main article element, dropping comment sections.
+    """
+    # Filtering in XPath keeps the scan over every element inside libxml2
+    for element in _NON_CONTENT_XPATH(main):
+        if element is main:
+            return ""
+        element.drop_tree()
+
+    return _BLANK_LINES.sub("\n", "\n".join(main.itertext())).strip()
+
+
+def parse_html(html: Union[str, bytes]) -> tuple[str, str]:
+    """
+    Extracts the title and main text of an article page.
+
+    This is pure CPU work with no I/O, so it can run in any worker thread.
+
+    Args:
+        html (Union[str, bytes]): The page HTML. Raw bytes are preferred so the parser can honour the page's declared encoding.
+
+    Returns:
+        tuple[str, str]: The page title (empty if none was found) and the extracted text.
+    """
+    # Most article pages wrap their content in <article> or <main>; only fall back
+    # to readability's much slower scoring when that yields too little text.
+    title, text = "", ""
+    main_element = _find_main_element(html)
+    if main_element is not None:
+        title, main = main_element
+        text = _html_to_text(main)
+    if len(text) < _MIN_MAIN_ELEMENT_CHARS:
+        from readability import Document
+
+        doc = Document(html)
+        title = doc.short_title()
+        try:
+            text = _html_to_text(lxml.html.fromstring(doc.summary()))
+        except etree.ParserError:
+            text = ""
+    return title, text
 
 
 class Article:
@@ -75,11 +477,15 @@ class Article:
         """
         Extracts the article content and title from a file using pymupdf.
         """
-        doc = pymupdf.open(self.file_path)
-        title = (doc.metadata or {}).get("title") or os.path.basename(self.file_path or "")
-        text = ""
-        for page in doc:
-            text += page.get_text("text") # type: ignore
+        # Imported on first use: pymupdf is slow to load and only needed for local files
+        import pymupdf
+
+        # Default plain-text extraction flags, minus ligature preservation: ligatures are
+        # expanded to plain letters, which is both cheaper and friendlier to the model
+        flags = pymupdf.TEXTFLAGS_TEXT & ~pymupdf.TEXT_PRESERVE_LIGATURES
+        with pymupdf.open(self.file_path) as doc:
+            title = (doc.metadata or {}).get("title") or os.path.basename(self.file_path or "")
+            text = "".join(page.get_text("text", flags=flags) for page in doc)  # type: ignore
         self.title = title
         self.text = text
 
@@ -91,58 +497,73 @@ class Article:
             use_cache (bool): Whether to use local caching of the article content.
             model (Optional[str]): OpenAI model to use for fallback text extraction. If None, uses default from config.
         """
-        cache_path = None
+        cache_dir = ".article_cache"
+        url_hash = None
+        meta_path = None
+        cached_entry: Optional[tuple[str, str, str]] = None
+        cached_meta: Dict[str, Any] = {}
+        conditional_headers: Dict[str, str] = {}
         if use_cache:
-            cache_dir = ".article_cache"
             os.makedirs(cache_dir, exist_ok=True)
-            url_hash = hashlib.sha256((self.url or "").encode("utf-8")).hexdigest()
-            cache_path = os.path.join(cache_dir, f"{url_hash}.txt")
-            if os.path.exists(cache_path):
-                with open(cache_path, "r", encoding="utf-8") as f:
-                    self.file_path = cache_path
-                    lines = f.readlines()
-                    if lines:
-                        self.title = lines[0].strip()
-                        self.text = "".join(lines[1:]).strip()
-                        return
-
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/113.0.0.0 Safari/537.36"
-            )
-        }
+            url_hash = _url_cache_key(self.url or "")
+            meta_path = os.path.join(cache_dir, f"{url_hash}.json")
+            _migrate_legacy_cache_entry(cache_dir, self.url or "", url_hash)
+            cached_entry = _read_cache_entry(cache_dir, url_hash)
+            if cached_entry is not None:
+                if os.path.exists(meta_path):
+                    try:
+                        with open(meta_path, "r", encoding="utf-8") as f:
+                            cached_meta = json.load(f)
+                    except (json.JSONDecodeError, IOError):
+                        cached_meta = {}
+                # Still fresh per the server's Cache-Control max-age: no request needed
+                if (cached_meta.get("fresh_until") or 0) > time.time():
+                    self.file_path, self.title, self.text = cached_entry
+                    return
+                if cached_meta.get("etag"):
+                    conditional_headers["If-None-Match"] = cached_meta["etag"]
+                if cached_meta.get("last_modified"):
+                    conditional_headers["If-Modified-Since"] = cached_meta["last_modified"]
+                # Without validators the cached copy can't be revalidated, so use it as-is
+                if not conditional_headers:
+                    self.file_path, self.title, self.text = cached_entry
+                    return
+
         try:
-            response = requests.get(self.url or "", headers=headers, timeout=15)
+            response = _session.get(self.url or "", headers=conditional_headers, timeout=15)
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
+            # Revalidation failed (offline, timeout, server error): the cached copy is still usable
+            if cached_entry is not None:
+                print(f"Could not revalidate {self.url} ({e}); using the cached copy.")
+                self.file_path, self.title, self.text = cached_entry
+                return
             raise RuntimeError(f"Failed to fetch {self.url}: {e}")
 
-        doc = Document(response.text)
-        title = doc.short_title() or (self.url or "")
-        main_html = doc.summary()
-        soup = BeautifulSoup(main_html, "html.parser")
+        # Not modified since it was cached: reuse the stored text without parsing anything
+        if response.status_code == 304 and cached_entry is not None:
+            self.file_path, self.title, self.text = cached_entry
+            # A 304 can renew freshness; validators missing from it are kept from before
+            refreshed = _cache_meta(response.headers)
+            cached_meta.update({key: value for key, value in refreshed.items() if value is not None})
+            _write_cache_meta(meta_path, cached_meta)
+            return
 
-        # Remove sections with id or class containing "comment"
-        for tag in soup.find_all(
-            lambda t: (
-                (t.has_attr("id") and any("comment" in x.lower() for x in t["id"]))
-                or (t.has_attr("class") and any("comment" in x.lower() for x in t["class"]))
-            )
-        ):
-            tag.decompose()
+        response_headers = response.headers
 
-        text = soup.get_text(separator="\n", strip=True)
-        text = "\n".join(line for line in text.splitlines() if line.strip())
+        title, text = parse_html(response.content)
+        title = title or (self.url or "")
 
         # Fallback to GPT parsing if text extraction failed.
         if not text:
+            client = get_client()
             if not client:
                 raise RuntimeError(f"Failed to extract text from {self.url} and no OpenAI client available for fallback extraction.")
             selected_model = model or MODEL
             print(f"Failed to extract text from {self.url}. Using GPT extraction fallback with model {selected_model}.")
-            response = client.chat.completions.create(
+            acquire_rate_limits(len(response.text) // 4 + _PROMPT_AND_OUTPUT_TOKENS)
+            response = call_with_backoff(
+                client.chat.completions.create,
                 model=selected_model,
                 messages=[
                     {
@@ -158,18 +579,17 @@ class Article:
             )
             content = response.choices[0].message.content if response.choices else ""
             if content:
-                lines = content.splitlines()
-                title = lines[0].strip().replace("Title: ", "")
-                text = "\n".join(line.strip() for line in lines[1:] if line.strip())
+                first_line, _, body = content.partition("\n")
+                title = first_line.strip().replace("Title: ", "")
+                text = _BLANK_LINES.sub("\n", body).strip()
             else:
                 raise RuntimeError(f"Failed to extract text with GPT fallback for {self.title or 'Unknown'} - {self.url}.")
 
         self.title = title
         self.text = text
-        if use_cache and cache_path is not None:
-            with open(cache_path, "w", encoding="utf-8") as f:
-                f.write(title + "\n")
-                f.write(text)
+        if use_cache and url_hash is not None and meta_path is not None:
+            _write_cache_entry(cache_dir, url_hash, title, text)
+            _write_cache_meta(meta_path, _cache_meta(response_headers))
 
     def _generate_content_hash(self) -> None:
         """
@@ -200,18 +620,33 @@ class Article:
         Args:
             deck (str): The name of the deck where cards were added.
         """
-        if not self.content_hash:
-            self._generate_content_hash()
+        Article.bulk_mark_processed([(self, deck)])
 
+    @staticmethod
+    def bulk_mark_processed(processed: List[Tuple["Article", str]]) -> None:
+        """
+        Marks several articles as processed with a single read and write of the processed articles file.
+
+        Args:
+            processed (List[Tuple[Article, str]]): Articles paired with the deck their cards were added to.
+        """
+        if not processed:
+            return
         processed_articles = get_processed_articles()
-        processed_articles[self.identifier] = {
-            "title": self.title,
-            "hash": self.content_hash,
-            "deck": deck
-        }
+        for article, deck in processed:
+            if not article.content_hash:
+                article._generate_content_hash()
+            processed_articles[article.identifier] = {
+                "title": article.title,
+                "hash": article.content_hash,
+                "deck": deck
+            }
         save_processed_articles(processed_articles)
 
-    def generate_cards(self, custom_prompt: Optional[str] = None, model: Optional[str] = None) -> tuple[List[str], List[str]]:
+    def generate_cards(self, custom_prompt: Optional[str] = None, model: Optional[str] = None,
+                       semantic_cache: Optional["SemanticCardCache"] = None,
+                       use_llm_cache: bool = False, chunk_tokens: Optional[int] = None,
+                       json_output: bool = False) -> tuple[List[str], List[str]]:
         """
         Generates Anki flashcards from the article's text using GPT completions.
         For each key concept, the optimal card format (cloze or basic) is chosen
@@ -220,6 +655,12 @@ class Article:
         Args:
             custom_prompt (Optional[str]): Additional instructions to modify the base prompt.
             model (Optional[str]): OpenAI model to use for generation. If None, uses default from config.
+            semantic_cache (Optional[SemanticCardCache]): Cache used to reuse cards generated for a
+                near-identical article instead of calling the model again.
+            use_llm_cache (bool): Whether to reuse the cached output of an identical earlier request.
+            chunk_tokens (Optional[int]): If set, articles longer than this many tokens are split into
+                parts that are processed in parallel, and the resulting cards are merged by one more request.
+            json_output (bool): Whether to request the cards as schema-validated JSON instead of CLOZE/BASIC text.
 
         Returns:
             tuple[List[str], List[str]]: A tuple with a list of cloze cards and a list of basic cards.
@@ -228,127 +669,576 @@ class Article:
         if self.is_processed:
             print(f"Skipping card generation for \"{self.title or self.identifier}\": already processed.")
             return [], []
-        base_prompt = """
-You are a spaced repetition tutor creating Anki flashcards from an article the user provides.
 
-Your task is to extract key ideas and present each one using the optimal flashcard format. For each distinct concept, choose either cloze or basic format based on what works best for that specific type of information.
+        # Use provided model or fall back to default
+        selected_model = model or MODEL
+        chunked = bool(chunk_tokens) and count_tokens(self.text or "", selected_model) > chunk_tokens
+        # Articles split into parts use their full text, so the messages are only truncated otherwise
+        messages = self._build_messages(custom_prompt, selected_model, max_tokens=None if chunked else MAX_ARTICLE_TOKENS)
 
-Card Format Selection Guidelines:
+        cache_key = None
+        if use_llm_cache:
+            cache_key = generation_cache_key(selected_model, messages, _TEMPERATURE)
+            cached_output = load_generated_output(cache_key)
+            if cached_output is not None:
+                print(f"Using cached cards for \"{self.title}\".")
+                return parse_cards(cached_output)
 
-Use CLOZE format for:
-- Main arguments and key supporting claims where the structure and context matter
-- Conceptual relationships where seeing the full sentence helps understanding
-- Complex ideas that benefit from partial context cues
-- Individual key terms or concepts that benefit from contextual understanding
+        if not get_client():
+            raise RuntimeError("OpenAI client not available. Please set OPENAI_API_KEY environment variable.")
 
-Use BASIC format for:
-- Clear definitions where a simple question-answer works best
-- Specific facts, statistics, or data points
-- Direct cause-effect relationships that can be asked simply
-- Terminology where the definition is the focus
+        embedding = None
+        if semantic_cache is not None and self.text:
+            embedding = semantic_cache.embed(self.text)
+            cached_output = semantic_cache.lookup(embedding, selected_model, custom_prompt)
+            if cached_output is not None:
+                print(f"Reusing cards for \"{self.title}\" from a near-identical article processed earlier.")
+                return parse_cards(cached_output)
 
-Card Creation Rules:
-- Prioritize QUALITY over quantity - create only cards that test meaningful, important concepts
-- Generate cards flexibly based on content richness, not a fixed ratio to word count
-- Each card should test a unique, distinct concept—avoid redundancy between cloze and basic cards
-- For cloze cards: Create SEPARATE cards for each concept, with only 1-3 cloze deletions per card maximum
-- Break down complex sentences into multiple simpler cloze cards if they contain multiple key concepts
-- NEVER create a single cloze card with more than 3 deletions - split into multiple cards instead
-- Each cloze card should focus on one main idea or concept, not multiple unrelated concepts
-- For basic cards: Use simple, direct questions with clear, short answers
-- Focus on the core reasoning, main arguments, and key definitions—AVOID trivial details, specific examples, dates, names, or incidental facts
-- Skip concepts that are too obvious, too specific, or unlikely to be useful for understanding the main ideas
-- Before creating each card, check if you've already covered the same concept in a different way
-- If an idea could work as either format, choose the one that makes the concept clearest and most memorable
+        print(f"Generating cards for \"{self.title}\" using model {selected_model}...")
+        request = _request_json_cards if json_output else _stream_cards
+        if chunked:
+            cloze_cards, basic_cards, generated_text = self._generate_chunked(custom_prompt, selected_model, chunk_tokens, request, json_output)
+        else:
+            cloze_cards, basic_cards, generated_text = request(messages, selected_model, f"\"{self.title}\"")
 
-Content Guidelines:
-- Identify the main argument (central thesis) and key supporting claims - prioritize these heavily
-- Extract meaningful definitions, distinctions, or relationships the author establishes
-- Focus on concepts that would be useful to remember weeks or months later
-- If the argument is implicit, infer the author's main points
-- Skip minor supporting details, specific examples, anecdotes, or background context unless essential
-- Avoid creating multiple cards that test essentially the same knowledge in different ways
-- It's better to create 3-5 excellent cards than 10+ mediocre or overlapping cards
-- Quality threshold: Each card should test knowledge someone would benefit from remembering weeks later
-- Avoid creating cards for:
-  * Specific examples, anecdotes, or illustrations (unless they ARE the main point)
-  * Dates, names, locations, or other trivia (unless central to the argument)
-  * Quotes or citations (unless the quote itself is a key concept)
-  * Obvious or universally known information
-  * Supporting details that don't contribute to core understanding
-  * Obvious statements or common knowledge
-  * Redundant concepts already covered by other cards
-- Ask yourself: "Does this card test understanding of a key concept that someone should remember?"
+        if cache_key is not None and generated_text:
+            save_generated_output(cache_key, generated_text)
+        if semantic_cache is not None and embedding is not None and generated_text:
+            semantic_cache.add(embedding, selected_model, custom_prompt, generated_text)
+        return cloze_cards, basic_cards
 
-Output Format:
-- Begin with the line CLOZE, then list all cloze cards
-- Then write BASIC, and list all basic cards
-- Format each card using semicolons:
-  - Cloze: {{c1::clozed phrase}} or {{c1::phrase1}} and {{c2::phrase2}} (max 3 deletions)
-  - Basic: Question ; Answer
-- Create multiple separate cloze cards rather than one card with many deletions
-- Each line should be one complete card testing one focused concept
-- Use ONLY the separators shown above - no extra semicolons or spaces
-- IMPORTANT: Replace any semicolons (;) in the original text content with commas (,) to avoid confusion with card format separators
+    def _generate_chunked(self, custom_prompt: Optional[str], model: str, chunk_tokens: int,
+                          request: Optional[Callable[[List[Dict[str, str]], str, str], tuple[List[str], List[str], str]]] = None,
+                          json_output: bool = False) -> tuple[List[str], List[str], str]:
+        """
+        Generates cards for a long article part by part, then merges them.
 
-Example of CORRECT multi-card approach:
-CLOZE
-{{c1::Traditional Rationality}} is phrased as social rules, with violations interpretable as {{c2::cheating}}.
-To {{c1::Bayesians}}, the brain is an {{c2::engine of accuracy}}.
-The problem of {{c1::Occam's Razor}} suggests that if two hypotheses fit the same observations equally well, why believe the simpler one is more likely to be true?
+        The parts are generated concurrently, so the wait is roughly that of the
+        slowest part plus the merge request rather than the sum of all parts.
 
-Example of INCORRECT approach (DON'T DO THIS):
-{{c1::Traditional Rationality}} is phrased as social rules, with violations interpretable as {{c2::cheating}}: if you break the rules and no one else is doing so, you're the first to defect—making you a bad, bad person. To {{c3::Bayesians}}, the brain is an engine of accuracy: if you violate the laws of rationality, the engine doesn't run, and this is equally true whether anyone else breaks the rules or not. The problem of {{c4::Occam's Razor}} suggests that if two hypotheses fit the same observations equally well, why believe the simpler one is more likely to be true?
+        Args:
+            custom_prompt (Optional[str]): Additional instructions to modify the base prompt.
+            model (str): OpenAI model to use for generation.
+            chunk_tokens (int): Maximum number of tokens per part.
+            request (Callable): Sends one generation request; _stream_cards by default.
+            json_output (bool): Whether the parts are generated as JSON, which the merge request must then return too.
 
-- Output only the formatted cards. No explanations, preambles, or summaries.
-"""
-        if custom_prompt:
-            prompt = (
-                base_prompt
-                + "\nThe user provided these additional instructions:\n"
-                + custom_prompt.strip()
-                + "\n\nArticle Content:\n"
-            )
+        Returns:
+            tuple[List[str], List[str], str]: The merged cloze cards, basic cards, and raw merged output.
+        """
+        request = request or _stream_cards
+        parts = chunk_text(self.text or "", chunk_tokens, model)
+        label = f"\"{self.title}\""
+        if len(parts) == 1:
+            return request(self._build_messages(custom_prompt, model), model, label)
+
+        print(f"Splitting {label} into {len(parts)} parts of up to {chunk_tokens} tokens...")
+        with ThreadPoolExecutor(max_workers=min(len(parts), GENERATION_WORKERS)) as executor:
+            outputs = list(executor.map(
+                lambda part: request(self._build_messages(custom_prompt, model, part), model, label)[2],
+                parts,
+            ))
+
+        print(f"Merging cards generated for the parts of {label}...")
+        merge_prompt = MERGE_JSON_CARDS_PROMPT if json_output else MERGE_CARDS_PROMPT
+        merge_messages = [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": _user_prompt_prefix(custom_prompt, merge_prompt) + "\n\n".join(outputs)},
+        ]
+        return request(merge_messages, model, label)
+
+    def _build_messages(self, custom_prompt: Optional[str] = None, model: Optional[str] = None,
+                        text: Optional[str] = None,
+                        max_tokens: Optional[int] = MAX_ARTICLE_TOKENS) -> List[Dict[str, str]]:
+        """
+        Builds the chat messages used to generate cards for this article.
+
+        Args:
+            custom_prompt (Optional[str]): Additional instructions to modify the base prompt.
+            model (Optional[str]): Model the messages are for, used to count tokens. If None, uses default from config.
+            text (Optional[str]): Text to generate cards from instead of the whole article, e.g. one part of it.
+            max_tokens (Optional[int]): Token budget the text is trimmed to, keeping its beginning and end. None disables trimming.
+
+        Returns:
+            List[Dict[str, str]]: The system and user messages for the chat completion.
+        """
+        source = (self.text or "") if text is None else text
+        text = source if max_tokens is None else truncate_to_token_budget(source, max_tokens, model)
+        if len(text) < len(source):
+            print(f"\"{self.title or self.identifier}\" is longer than {max_tokens} tokens; only its beginning and end will be used.")
+
+        return [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": _user_prompt_prefix(custom_prompt) + text},
+        ]
+
+
+@functools.lru_cache(maxsize=None)
+def _token_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Counts the tokens in a text, exactly with tiktoken if it is installed.
+
+    Args:
+        text (str): The text to measure.
+        model (Optional[str]): Model whose tokenizer to use. If None, uses default from config.
+
+    Returns:
+        int: The token count, or an estimate of about 4 characters per token without tiktoken.
+    """
+    if tiktoken is None:
+        return (len(text) + 3) // 4
+    return len(_token_encoding(model or MODEL).encode(text, disallowed_special=()))
+
+
+def chunk_text(text: str, max_tokens: int, model: Optional[str] = None) -> List[str]:
+    """
+    Splits a text into parts of at most ``max_tokens`` tokens at paragraph boundaries.
+
+    Paragraphs that are too long on their own are split between sentences. A single
+    sentence longer than the budget is kept whole.
+
+    Args:
+        text (str): The text to split.
+        max_tokens (int): Maximum number of tokens per part.
+        model (Optional[str]): Model whose tokenizer to use. If None, uses default from config.
+
+    Returns:
+        List[str]: The parts, in order.
+    """
+    pieces: List[tuple[str, int]] = []
+    for paragraph in text.split("\n"):
+        tokens = count_tokens(paragraph, model)
+        if tokens <= max_tokens:
+            pieces.append((paragraph, tokens))
         else:
-            prompt = base_prompt + "\nArticle Content:\n"
+            pieces.extend((sentence, count_tokens(sentence, model)) for sentence in _SENTENCE_END.split(paragraph))
 
-        full_prompt = prompt + (self.text or "")
+    parts: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece, tokens in pieces:
+        if current and current_tokens + tokens > max_tokens:
+            parts.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        parts.append("\n".join(current))
+    return parts
 
-        if not client:
-            raise RuntimeError("OpenAI client not available. Please set OPENAI_API_KEY environment variable.")
 
-        # Use provided model or fall back to default
-        selected_model = model or MODEL
-        print(f"Generating cards for \"{self.title}\" using model {selected_model}...")
+def truncate_to_token_budget(text: str, max_tokens: int = MAX_ARTICLE_TOKENS, model: Optional[str] = None) -> str:
+    """
+    Shortens a text to a token budget, keeping its beginning and end.
 
-        response = client.chat.completions.create(
-            model=selected_model,
-            messages=[
-                {"role": "system", "content": "You generate high-quality Anki cards from articles."},
-                {"role": "user", "content": full_prompt},
-            ],
-            temperature=0.7,
-        )
-        generated_text = (
-            response.choices[0].message.content.strip() if response.choices and response.choices[0].message.content else ""
-        )
-
-        cloze_cards: List[str] = []
-        basic_cards: List[str] = []
-        current_section: Optional[str] = None
-        for line in generated_text.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            if line.upper().startswith("CLOZE"):
-                current_section = "cloze"
-                continue
-            if line.upper().startswith("BASIC"):
-                current_section = "basic"
-                continue
-            if current_section == "cloze":
-                cloze_cards.append(line)
-            elif current_section == "basic":
-                basic_cards.append(line)
+    The opening and conclusion of an article usually carry its main claims, so the
+    middle is dropped. Without tiktoken the budget is applied at about 4 characters
+    per token.
 
-        return cloze_cards, basic_cards
+    Args:
+        text (str): The text to shorten.
+        max_tokens (int): Maximum number of tokens to keep.
+        model (Optional[str]): Model whose tokenizer to use. If None, uses default from config.
+
+    Returns:
+        str: The text itself if it fits, otherwise its head and tail joined by a marker line.
+    """
+    if tiktoken is None:
+        max_chars = max_tokens * 4
+        if len(text) <= max_chars:
+            return text
+        return text[:max_chars // 2] + _TRUNCATION_MARKER + text[-(max_chars // 2):]
+    encoding = _token_encoding(model or MODEL)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    half = max_tokens // 2
+    return encoding.decode(tokens[:half]) + _TRUNCATION_MARKER + encoding.decode(tokens[-half:])
+
+
+def group_articles(articles: List[Article], max_articles: int, max_tokens: int = MULTI_ARTICLE_MAX_TOKENS,
+                   model: Optional[str] = None) -> List[List[Article]]:
+    """
+    Groups articles for multi-article requests, keeping each group within a token budget.
+
+    Articles keep their order. An article that alone exceeds the budget gets a group of its own.
+
+    Args:
+        articles (List[Article]): Articles with fetched text.
+        max_articles (int): Maximum number of articles per group.
+        max_tokens (int): Maximum estimated article tokens per group.
+        model (Optional[str]): Model whose tokenizer to use for the estimate.
+
+    Returns:
+        List[List[Article]]: The article groups.
+    """
+    groups: List[List[Article]] = []
+    current: List[Article] = []
+    current_tokens = 0
+    for article in articles:
+        tokens = count_tokens(article.text or "", model)
+        if current and (len(current) >= max_articles or current_tokens + tokens > max_tokens):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(article)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def generate_cards_multi(articles: List[Article], custom_prompt: Optional[str] = None,
+                         model: Optional[str] = None) -> Dict[str, tuple[List[str], List[str]]]:
+    """
+    Generates cards for several articles with a single chat completion.
+
+    The base prompt is sent once for the whole group and the model marks each
+    article's cards with an ===OUTPUT N=== line, which is used to split them again.
+    This trades a longer response for fewer requests, which helps when the
+    requests-per-minute limit is hit before the tokens-per-minute limit.
+
+    Args:
+        articles (List[Article]): Articles with fetched text to generate cards for.
+        custom_prompt (Optional[str]): Additional instructions to modify the base prompt.
+        model (Optional[str]): OpenAI model to use for generation. If None, uses default from config.
+
+    Returns:
+        Dict[str, tuple[List[str], List[str]]]: Cloze and basic cards keyed by article identifier.
+    """
+    if not articles:
+        return {}
+    if len(articles) == 1:
+        article = articles[0]
+        return {article.identifier: article.generate_cards(custom_prompt=custom_prompt, model=model)}
+    client = get_client()
+    if not client:
+        raise RuntimeError("OpenAI client not available. Please set OPENAI_API_KEY environment variable.")
+
+    selected_model = model or MODEL
+    prompt = MULTI_ARTICLE_INSTRUCTIONS.format(count=len(articles)).lstrip()
+    if custom_prompt:
+        prompt += "\n" + _INSTRUCTIONS_HEADER + custom_prompt.strip() + "\n"
+    parts = [prompt]
+    for number, article in enumerate(articles, start=1):
+        parts.append(f"\n===ARTICLE {number}: {article.title or article.identifier}===\n{article.text or ''}")
+
+    print(f"Generating cards for {len(articles)} articles in one request using model {selected_model}...")
+    text_length = sum(len(article.text or "") for article in articles)
+    acquire_rate_limits(text_length // 4 + _PROMPT_AND_OUTPUT_TOKENS * len(articles))
+    response = call_with_backoff(
+        client.chat.completions.create,
+        model=selected_model,
+        messages=[
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": "".join(parts)},
+        ],
+        temperature=_TEMPERATURE,
+    )
+    _report_cached_tokens(response.usage, f"{len(articles)} articles")
+    content = response.choices[0].message.content if response.choices else ""
+
+    # re.split with a capturing group alternates the article numbers with their output blocks
+    blocks = _OUTPUT_DELIMITER.split(content or "")
+    results: Dict[str, tuple[List[str], List[str]]] = {}
+    for number, block in zip(blocks[1::2], blocks[2::2]):
+        index = int(number) - 1
+        if not 0 <= index < len(articles):
+            print(f"Ignoring output for unknown article {number} in the combined response.")
+        elif articles[index].identifier in results:
+            # Keep the first block rather than guess which one belongs to the article
+            print(f"Ignoring repeated output for article {number} in the combined response.")
+        else:
+            results[articles[index].identifier] = split_cards(block)
+    missing = [article for article in articles if article.identifier not in results]
+    if missing:
+        print(f"No output for {len(missing)} of {len(articles)} articles in the combined response.")
+    return results
+
+
+def iter_cards(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """
+    Parses model output line by line, yielding each card as soon as its line is complete.
+
+    Args:
+        lines (Iterable[str]): Lines of model output with a CLOZE section followed by a BASIC section.
+
+    Yields:
+        tuple[str, str]: The section ("cloze" or "basic") and the card text.
+    """
+    current_section: Optional[str] = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        header = _SECTION_HEADER.match(line)
+        if header:
+            current_section = header.group(1).lower()
+            continue
+        if current_section is not None:
+            yield current_section, line
+
+
+def split_cards(generated_text: str) -> tuple[List[str], List[str]]:
+    """
+    Splits generated model output into cloze and basic cards.
+
+    Args:
+        generated_text (str): Model output with a CLOZE section followed by a BASIC section.
+
+    Returns:
+        tuple[List[str], List[str]]: A tuple with a list of cloze cards and a list of basic cards.
+    """
+    # re.split with a capturing group alternates the section headers with their blocks
+    parts = _SECTION_SPLIT.split(generated_text)
+    cloze_cards: List[str] = []
+    basic_cards: List[str] = []
+    for header, block in zip(parts[1::2], parts[2::2]):
+        block = _BLANK_LINES.sub("\n", block).strip()
+        if block:
+            (cloze_cards if header.lower() == "cloze" else basic_cards).extend(block.split("\n"))
+    return cloze_cards, basic_cards
+
+
+def _cards_from_json(output: str) -> tuple[List[str], List[str]]:
+    """
+    Converts structured JSON output into cloze and basic cards.
+
+    Basic cards are rendered in the usual "front ; back" form, with semicolons inside
+    the fields replaced so they can't be mistaken for the separator.
+
+    Args:
+        output (str): Model output matching CARD_SCHEMA.
+
+    Returns:
+        tuple[List[str], List[str]]: A tuple with a list of cloze cards and a list of basic cards.
+    """
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError as e:
+        print(f"Could not parse JSON card output: {e}")
+        return [], []
+    if not isinstance(data, dict):
+        print("Could not parse JSON card output: expected an object with 'cloze' and 'basic' lists")
+        return [], []
+    # Ignore anything that isn't a list, e.g. null or a bare string, rather than iterating it
+    cloze = data.get("cloze") if isinstance(data.get("cloze"), list) else []
+    basic = data.get("basic") if isinstance(data.get("basic"), list) else []
+    cloze_cards = [card.strip() for card in cloze if isinstance(card, str) and card.strip()]
+    basic_cards = [
+        f"{card['front'].replace(';', ',').strip()} ; {str(card.get('back', '')).replace(';', ',').strip()}"
+        for card in basic
+        if isinstance(card, dict) and isinstance(card.get("front"), str) and card["front"].strip()
+    ]
+    return cloze_cards, basic_cards
+
+
+def parse_cards(output: str) -> tuple[List[str], List[str]]:
+    """
+    Parses generated output in either format: JSON from --json-output, or CLOZE/BASIC text.
+
+    Args:
+        output (str): Raw model output, e.g. from a cache.
+
+    Returns:
+        tuple[List[str], List[str]]: A tuple with a list of cloze cards and a list of basic cards.
+    """
+    if output.lstrip().startswith("{"):
+        return _cards_from_json(output)
+    return split_cards(output)
+
+
+def _request_json_cards(messages: List[Dict[str, str]], model: str, label: str) -> tuple[List[str], List[str], str]:
+    """
+    Sends one card generation request with structured JSON output.
+
+    The JSON instructions go in a second system message, so the first one stays
+    identical to text requests and keeps benefiting from prompt caching.
+
+    Args:
+        messages (List[Dict[str, str]]): Chat messages for the request.
+        model (str): OpenAI model to use. It must support structured outputs.
+        label (str): What the request is for, used in log messages.
+
+    Returns:
+        tuple[List[str], List[str], str]: The cloze cards, basic cards, and raw JSON output.
+    """
+    client = get_client()
+    if not client:
+        raise RuntimeError("OpenAI client not available. Please set OPENAI_API_KEY environment variable.")
+
+    acquire_rate_limits(len(messages[-1]["content"]) // 4 + _PROMPT_AND_OUTPUT_TOKENS)
+    response = call_with_backoff(
+        client.chat.completions.create,
+        model=model,
+        messages=messages[:1] + [{"role": "system", "content": JSON_OUTPUT_INSTRUCTIONS}] + messages[1:],
+        temperature=_TEMPERATURE,
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "anki_cards", "strict": True, "schema": CARD_SCHEMA},
+        },
+    )
+    _report_cached_tokens(response.usage, label)
+    output = (response.choices[0].message.content or "").strip() if response.choices else ""
+    cloze_cards, basic_cards = _cards_from_json(output) if output else ([], [])
+    return cloze_cards, basic_cards, output
+
+
+def _stream_cards(messages: List[Dict[str, str]], model: str, label: str) -> tuple[List[str], List[str], str]:
+    """
+    Sends one streaming card generation request and parses the cards as they arrive.
+
+    Args:
+        messages (List[Dict[str, str]]): Chat messages for the request.
+        model (str): OpenAI model to use.
+        label (str): What the request is for, used in log messages.
+
+    Returns:
+        tuple[List[str], List[str], str]: The cloze cards, basic cards, and raw output.
+    """
+    client = get_client()
+    if not client:
+        raise RuntimeError("OpenAI client not available. Please set OPENAI_API_KEY environment variable.")
+
+    # Roughly 4 characters per token for English text
+    acquire_rate_limits(len(messages[-1]["content"]) // 4 + _PROMPT_AND_OUTPUT_TOKENS)
+    stream = call_with_backoff(
+        client.chat.completions.create,
+        model=model,
+        messages=messages,
+        temperature=_TEMPERATURE,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+
+    # Cards are parsed while the response streams in instead of after it completes
+    chunks: List[str] = []
+    usage: List[Any] = []
+    cloze_cards: List[str] = []
+    basic_cards: List[str] = []
+    for section, card in iter_cards(_iter_stream_lines(stream, chunks, usage)):
+        (cloze_cards if section == "cloze" else basic_cards).append(card)
+    if usage:
+        _report_cached_tokens(usage[-1], label)
+    return cloze_cards, basic_cards, "".join(chunks).strip()
+
+
+def _report_cached_tokens(usage, label: str) -> None:
+    """
+    Prints how many input tokens were served from OpenAI's prompt cache, if any.
+
+    Args:
+        usage: The usage object of a chat completion.
+        label (str): What the request was for, used in the message.
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None) or 0
+    if cached_tokens:
+        print(f"Prompt cache hit for {label}: {cached_tokens} of {usage.prompt_tokens} input tokens cached.")
+
+
+def _iter_stream_lines(stream, chunks: List[str], usage: Optional[List[Any]] = None) -> Iterator[str]:
+    """
+    Yields complete lines from a streamed chat completion as they arrive.
+
+    Args:
+        stream: Iterator of chat completion chunks.
+        chunks (List[str]): Receives every content delta, so the caller can rebuild the full output.
+        usage (Optional[List[Any]]): Receives the token usage reported in the final chunk, if requested.
+
+    Yields:
+        str: Each line of the output, without the trailing newline.
+    """
+    buffer = ""
+    for chunk in stream:
+        if usage is not None and getattr(chunk, "usage", None):
+            usage.append(chunk.usage)
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        delta = chunk.choices[0].delta.content
+        chunks.append(delta)
+        buffer += delta
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            yield line
+    if buffer:
+        yield buffer
+
+
+def generate_cards_batch(articles: List[Article], custom_prompt: Optional[str] = None, model: Optional[str] = None,
+                         poll_interval: float = 30) -> Dict[str, tuple[List[str], List[str]]]:
+    """
+    Generates cards for many articles with a single OpenAI Batch API job.
+
+    Batch jobs are billed at a discount and run on the provider side, so this is
+    suited to large non-interactive runs. It blocks until the job finishes, which
+    can take anywhere from minutes up to the 24h completion window.
+
+    Args:
+        articles (List[Article]): Articles with fetched text to generate cards for.
+        custom_prompt (Optional[str]): Additional instructions to modify the base prompt.
+        model (Optional[str]): OpenAI model to use for generation. If None, uses default from config.
+        poll_interval (float): Seconds to wait between batch status checks.
+
+    Returns:
+        Dict[str, tuple[List[str], List[str]]]: Cloze and basic cards keyed by article identifier.
+    """
+    client = get_client()
+    if not client:
+        raise RuntimeError("OpenAI client not available. Please set OPENAI_API_KEY environment variable.")
+    if not articles:
+        return {}
+
+    selected_model = model or MODEL
+    requests_jsonl = "\n".join(
+        json.dumps({
+            "custom_id": str(index),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": selected_model,
+                "messages": article._build_messages(custom_prompt, selected_model),
+                "temperature": _TEMPERATURE,
+            },
+        })
+        for index, article in enumerate(articles)
+    )
+    batch_input = client.files.create(
+        file=("articles_to_anki_batch.jsonl", requests_jsonl.encode("utf-8")),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=batch_input.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    print(f"Submitted batch {batch.id} with {len(articles)} articles using model {selected_model}. Waiting for completion...")
+
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} finished with status '{batch.status}'.")
+
+    results: Dict[str, tuple[List[str], List[str]]] = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        article = articles[int(entry["custom_id"])]
+        if entry.get("error"):
+            print(f"Batch request failed for \"{article.title or article.identifier}\": {entry['error']}")
+            continue
+        choices = ((entry.get("response") or {}).get("body") or {}).get("choices") or []
+        generated_text = (choices[0]["message"].get("content") or "").strip() if choices else ""
+        results[article.identifier] = split_cards(generated_text)
+
+    return results
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple
+
+from articles_to_anki.config import CARD_CACHE_DIR, EMBEDDING_MODEL, GENERATED_CACHE_DIR, GENERATED_CACHE_MAX_AGE_DAYS, SEMANTIC_CACHE_THRESHOLD, get_client
+from articles_to_anki.rate_limit import call_with_backoff, request_limiter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# text-embedding-3-small accepts up to 8191 tokens; ~4 characters per token keeps us under it
+_MAX_EMBEDDING_CHARS = 30000
+
+# The most recently read or written outputs, keyed to the entry's mtime so repeated
+# requests in a run skip re-reading unchanged entries. Bounded: the disk cache holds the rest.
+_MAX_RECENT_OUTPUTS = 32
+_recent_outputs: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_recent_outputs_lock = threading.Lock()
+
+
+def _remember_output(key: str, output: str, saved_at: float) -> None:
+    """Adds an output to the in-process memo, evicting the least recently used entry."""
+    with _recent_outputs_lock:
+        _recent_outputs[key] = (output, saved_at)
+        _recent_outputs.move_to_end(key)
+        while len(_recent_outputs) > _MAX_RECENT_OUTPUTS:
+            _recent_outputs.popitem(last=False)
+
+
+class SemanticCardCache:
+    """
+    Caches generated card output keyed by article embeddings, so that near-duplicate
+    articles (reposts, mirrors, minor edits) reuse earlier cards instead of paying for
+    another chat completion.
+
+    Entries are scoped by model and custom prompt, and persisted in a single .npz file
+    holding the normalized embedding matrix alongside the raw model output.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        """
+        Initialize the cache and load any previously saved entries.
+
+        Args:
+            path (Optional[str]): Path of the .npz file. Defaults to cards.npz in CARD_CACHE_DIR.
+            threshold (float): Minimum cosine similarity for two articles to share cards.
+
+        Raises:
+            RuntimeError: If numpy is not installed.
+        """
+        if np is None:
+            raise RuntimeError(
+                "The semantic card cache requires numpy. Install it with:\n"
+                "pip install articles-to-anki[semantic_cache]"
+            )
+        self.path = path or os.path.join(CARD_CACHE_DIR, "cards.npz")
+        self.threshold = threshold
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self.scopes: List[str] = []
+        self.outputs: List[str] = []
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.path):
+            try:
+                with np.load(self.path) as data:
+                    self.embeddings = data["embeddings"].astype(np.float32)
+                    self.scopes = data["scopes"].tolist()
+                    self.outputs = data["outputs"].tolist()
+            except (OSError, KeyError, ValueError) as e:
+                print(f"Error reading {self.path}, starting with an empty card cache: {e}")
+
+    @staticmethod
+    def _scope(model: str, custom_prompt: Optional[str]) -> str:
+        return hashlib.sha256(f"{model}\n{custom_prompt or ''}".encode("utf-8")).hexdigest()
+
+    def embed(self, text: str):
+        """
+        Computes the normalized embedding of an article's text.
+
+        Args:
+            text (str): The article text.
+
+        Returns:
+            numpy.ndarray: A unit-length embedding vector.
+        """
+        client = get_client()
+        if not client:
+            raise RuntimeError("OpenAI client not available. Please set OPENAI_API_KEY environment variable.")
+        request_limiter.acquire(1)
+        response = call_with_backoff(client.embeddings.create, model=EMBEDDING_MODEL, input=text[:_MAX_EMBEDDING_CHARS])
+        embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def lookup(self, embedding, model: str, custom_prompt: Optional[str] = None) -> Optional[str]:
+        """
+        Returns cached output for the most similar article, if it is similar enough.
+
+        Args:
+            embedding (numpy.ndarray): Normalized embedding of the new article.
+            model (str): Model the cards would be generated with.
+            custom_prompt (Optional[str]): Custom prompt the cards would be generated with.
+
+        Returns:
+            Optional[str]: The cached raw model output, or None on a miss.
+        """
+        scope = self._scope(model, custom_prompt)
+        with self._lock:
+            if not self.outputs or self.embeddings.shape[1] != embedding.shape[0]:
+                return None
+            similarities = self.embeddings @ embedding
+            in_scope = np.fromiter((s == scope for s in self.scopes), dtype=bool, count=len(self.scopes))
+            similarities[~in_scope] = -1.0
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                return self.outputs[best]
+        return None
+
+    def add(self, embedding, model: str, custom_prompt: Optional[str], output: str) -> None:
+        """
+        Adds generated output to the cache.
+
+        Args:
+            embedding (numpy.ndarray): Normalized embedding of the article.
+            model (str): Model the cards were generated with.
+            custom_prompt (Optional[str]): Custom prompt the cards were generated with.
+            output (str): Raw model output.
+        """
+        with self._lock:
+            if self.outputs and self.embeddings.shape[1] == embedding.shape[0]:
+                self.embeddings = np.vstack([self.embeddings, embedding[np.newaxis, :]])
+            else:
+                # First entry, or the embedding model changed dimensions: start over
+                self.embeddings = embedding[np.newaxis, :].astype(np.float32)
+                self.scopes, self.outputs = [], []
+            self.scopes.append(self._scope(model, custom_prompt))
+            self.outputs.append(output)
+
+    def save(self) -> None:
+        """Writes the cache to disk."""
+        with self._lock:
+            if not self.outputs:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                np.savez(
+                    self.path,
+                    embeddings=self.embeddings,
+                    scopes=np.array(self.scopes),
+                    outputs=np.array(self.outputs),
+                )
+            except OSError as e:
+                print(f"Error saving {self.path}: {e}")
+
+
+def generation_cache_key(model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+    """
+    Returns the cache key for a card generation request.
+
+    The key covers everything sent to the model, so editing the prompt, the custom
+    instructions, the article text, or the model invalidates earlier entries.
+
+    Args:
+        model (str): Model used for the request.
+        messages (List[Dict[str, str]]): Chat messages sent to the model.
+        temperature (float): Sampling temperature of the request.
+
+    Returns:
+        str: A hex digest identifying the request.
+    """
+    payload = json.dumps({"model": model, "messages": messages, "temperature": temperature}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_generated_output(key: str) -> Optional[str]:
+    """
+    Returns the cached raw model output for a request key, if any.
+
+    Entries older than GENERATED_CACHE_MAX_AGE_DAYS are deleted and treated as a miss.
+
+    Args:
+        key (str): Key from generation_cache_key.
+
+    Returns:
+        Optional[str]: The cached output, or None on a miss.
+    """
+    cache_path = os.path.join(GENERATED_CACHE_DIR, f"{key}.txt")
+    try:
+        saved_at = os.path.getmtime(cache_path)
+    except OSError:
+        return None
+    if time.time() - saved_at > GENERATED_CACHE_MAX_AGE_DAYS * 86400:
+        with _recent_outputs_lock:
+            _recent_outputs.pop(key, None)
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return None
+    with _recent_outputs_lock:
+        recent = _recent_outputs.get(key)
+        if recent is not None and recent[1] == saved_at:
+            _recent_outputs.move_to_end(key)
+            return recent[0]
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            output = f.read()
+    except IOError as e:
+        print(f"Error reading {cache_path}: {e}")
+        return None
+    _remember_output(key, output, saved_at)
+    return output
+
+
+def save_generated_output(key: str, output: str) -> None:
+    """
+    Stores raw model output under a request key.
+
+    The entry is written to a temporary file and renamed into place, so an
+    interrupted run never leaves a truncated entry behind to be reused later.
+
+    Args:
+        key (str): Key from generation_cache_key.
+        output (str): Raw model output.
+    """
+    cache_path = os.path.join(GENERATED_CACHE_DIR, f"{key}.txt")
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(GENERATED_CACHE_DIR, exist_ok=True)
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(output)
+        os.replace(temp_path, cache_path)
+        _remember_output(key, output, os.path.getmtime(cache_path))
+    except IOError as e:
+        print(f"Error saving {cache_path}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
@@ -1,10 +1,33 @@
+import atexit
 import os
 import argparse
 import requests
-from typing import Optional, List
-from articles_to_anki.config import OPENAI_API_KEY, URLS_FILE, ARTICLE_DIR, ALLOWED_EXTENSIONS, ANKICONNECT_URL, CLOZE_MODEL_NAME, BASIC_MODEL_NAME, SIMILARITY_THRESHOLD
-from articles_to_anki.articles import Article
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import deque
+from typing import Optional, List, Tuple, Callable, Iterable, Iterator
+from urllib.parse import urlsplit
+from articles_to_anki.config import OPENAI_API_KEY, URLS_FILE, ARTICLE_DIR, ALLOWED_EXTENSIONS, CLOZE_MODEL_NAME, BASIC_MODEL_NAME, SIMILARITY_THRESHOLD, SEMANTIC_CACHE_THRESHOLD, FETCH_WORKERS, FILE_READ_WORKERS, GENERATION_WORKERS, ARTICLE_PART_TOKENS
+from articles_to_anki.articles import Article, generate_cards_batch, generate_cards_multi, group_articles
 from articles_to_anki.export_cards import ExportCards
+from articles_to_anki import anki_connect
+from articles_to_anki.card_cache import SemanticCardCache
+
+def resolve_article_paths() -> Tuple[str, str]:
+    """
+    Locates the articles directory and default URLs file.
+
+    They are looked up in the current directory first, then in the parent directory,
+    so the command also works when run from inside the articles directory.
+
+    Returns:
+        Tuple[str, str]: The articles directory and the default URLs file path.
+    """
+    if not os.path.exists(ARTICLE_DIR):
+        parent_article_dir = os.path.join("..", ARTICLE_DIR)
+        if os.path.exists(parent_article_dir):
+            return parent_article_dir, os.path.join("..", URLS_FILE)
+    return ARTICLE_DIR, URLS_FILE
+
 
 def check_config() -> None:
     """
@@ -19,19 +42,8 @@ def check_config() -> None:
         raise ValueError("OPENAI_API_KEY must be set in the environment variables(or in config.py). Use the following command:\nexport OPENAI_API_KEY='your_api_key'")
 
     # Check if required directories and files exist
-    # Try to find them in current directory or parent directories
-    article_dir = ARTICLE_DIR
-    urls_file = URLS_FILE
-    
-    # If not found in current directory, check if we're in the articles directory
-    if not os.path.exists(article_dir):
-        if os.path.basename(os.getcwd()) == "articles" and os.path.exists("../articles"):
-            article_dir = "../articles"
-            urls_file = "../articles/urls.txt"
-        elif os.path.exists("../articles"):
-            article_dir = "../articles"
-            urls_file = "../articles/urls.txt"
-    
+    article_dir, urls_file = resolve_article_paths()
+
     if not os.path.exists(article_dir):
         raise FileNotFoundError(
             f"Required directories or files don't exist. Please run 'articles-to-anki-setup' "
@@ -93,15 +105,9 @@ def write_all_cards_to_files(all_cloze_cards: List[str], all_basic_cards: List[s
     os.makedirs("exported_cards", exist_ok=True)
     
     if choice == '1':  # Overwrite
+        # Opening with 'w' truncates any old files
         cloze_file = "exported_cards/cloze_cards.txt"
         basic_file = "exported_cards/basic_cards.txt"
-        
-        # Delete old files if they exist
-        if os.path.exists(cloze_file):
-            os.remove(cloze_file)
-        if os.path.exists(basic_file):
-            os.remove(basic_file)
-            
         mode = 'w'
         
     elif choice == '2':  # Timestamp
@@ -117,35 +123,44 @@ def write_all_cards_to_files(all_cloze_cards: List[str], all_basic_cards: List[s
     
     # Write cloze cards
     if all_cloze_cards:
-        with open(cloze_file, mode, encoding="utf-8") as f:
-            if mode == 'a' and os.path.getsize(cloze_file) > 0:
-                f.write("\n")  # Add separator if appending to non-empty file
-            for card in all_cloze_cards:
-                f.write(f"{card}\n")
+        _write_cards(cloze_file, all_cloze_cards, mode)
         print(f"Exported {len(all_cloze_cards)} cloze cards to {cloze_file}")
     
     # Write basic cards
     if all_basic_cards:
-        with open(basic_file, mode, encoding="utf-8") as f:
-            if mode == 'a' and os.path.getsize(basic_file) > 0:
-                f.write("\n")  # Add separator if appending to non-empty file
-            for card in all_basic_cards:
-                f.write(f"{card}\n")
+        _write_cards(basic_file, all_basic_cards, mode)
         print(f"Exported {len(all_basic_cards)} basic cards to {basic_file}")
 
 
+def _write_cards(file_path: str, cards: List[str], mode: str) -> None:
+    """
+    Write cards to a file, one per line, with a single write of the pre-joined text.
+    """
+    content = "\n".join(cards) + "\n"
+    with open(file_path, mode, encoding="utf-8") as f:
+        if mode == 'a' and os.path.getsize(file_path) > 0:
+            content = "\n" + content  # Add separator if appending to non-empty file
+        f.write(content)
+
+
 def check_anki_note_model() -> None:
-    """Checks if the Anki note model exists and creates it if not."""
+    """
+    Checks if the Anki note models exist and creates any that are missing.
+
+    Missing models are created together in a single AnkiConnect "multi" request, so
+    startup costs at most two round trips.
+    """
     payload = {
         "action": "modelNames",
         "version": 6
     }
     try:
-        response = requests.post(ANKICONNECT_URL, json=payload, timeout=15)
+        response = anki_connect.post(payload, timeout=15)
         response.raise_for_status()
-        models = response.json().get("result", [])
+        models = anki_connect.parse(response).get("result", [])
+        create_actions = []
         if f"{CLOZE_MODEL_NAME}" not in models:
-            create_model_payload = {
+            create_actions.append(("Cloze", CLOZE_MODEL_NAME, {
                 "action": "createModel",
                 "version": 6,
                 "params": {
@@ -176,14 +191,9 @@ def check_anki_note_model() -> None:
                         }
                     ]
                 }
-            }
-            create_response = requests.post(ANKICONNECT_URL, json=create_model_payload, timeout=15)
-            create_response.raise_for_status()
-            if create_response.json().get("error"):
-                raise RuntimeError(f"Failed to create Cloze model: {create_response.json().get('error')}")
-            print(f"Cloze model '{CLOZE_MODEL_NAME}' created in Anki.")
+            }))
         if f"{BASIC_MODEL_NAME}" not in models:
-            create_basic_model_payload = {
+            create_actions.append(("Basic", BASIC_MODEL_NAME, {
                 "action": "createModel",
                 "version": 6,
                 "params": {
@@ -210,12 +220,27 @@ def check_anki_note_model() -> None:
                         }
                     ]
                 }
+            }))
+        if not create_actions:
+            return
+
+        multi_payload = {
+            "action": "multi",
+            "version": 6,
+            "params": {
+                "actions": [action for _, _, action in create_actions]
             }
-            create_basic_response = requests.post(ANKICONNECT_URL, json=create_basic_model_payload, timeout=15)
-            create_basic_response.raise_for_status()
-            if create_basic_response.json().get("error"):
-                raise RuntimeError(f"Failed to create Basic model: {create_basic_response.json().get('error')}")
-            print(f"Basic model '{BASIC_MODEL_NAME}' created in Anki.")
+        }
+        create_response = anki_connect.post(multi_payload, timeout=15)
+        create_response.raise_for_status()
+        result = anki_connect.parse(create_response)
+        if result.get("error"):
+            raise RuntimeError(f"Failed to create note models: {result.get('error')}")
+        # Each action gets its own {"result", "error"} entry, in the order sent
+        for (label, model_name, _), action_result in zip(create_actions, result.get("result") or []):
+            if isinstance(action_result, dict) and action_result.get("error"):
+                raise RuntimeError(f"Failed to create {label} model: {action_result.get('error')}")
+            print(f"{label} model '{model_name}' created in Anki.")
     except requests.exceptions.RequestException as e:
         print(f"Failed to check Anki note models: {e}. Check if Anki is running and AnkiConnect is enabled.")
 
@@ -268,8 +293,133 @@ def read_urls_from_files(url_files):
     
     return all_urls
 
+def deduplicate_urls(urls: List[str]) -> List[str]:
+    """
+    Removes repeated URLs, keeping the first occurrence of each.
+
+    URLs are compared with the scheme and host lowercased and any trailing slash
+    removed, so "https://Example.com/post/" and "https://example.com/post" count as
+    the same article. The URL as first written is the one kept.
+
+    Args:
+        urls (List[str]): URLs in the order they were loaded.
+
+    Returns:
+        List[str]: The URLs without duplicates, in their original order.
+    """
+    seen = set()
+    unique_urls = []
+    for url in urls:
+        parts = urlsplit(url.strip())
+        key = (parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query)
+        if key not in seen:
+            seen.add(key)
+            unique_urls.append(url)
+    return unique_urls
+
+def iter_articles(urls: List[str], local_files: List[str], article_dir: str) -> Iterator[Article]:
+    """
+    Yields an Article for each URL and local file, creating each one only when it is needed.
+
+    Args:
+        urls (List[str]): URLs to process.
+        local_files (List[str]): File names inside ``article_dir``.
+        article_dir (str): Directory containing the local files.
+
+    Yields:
+        Article: URL articles first, then local file articles.
+    """
+    yield from (Article(url=url) for url in urls if url.strip())
+    yield from (Article(file_path=os.path.join(article_dir, file)) for file in local_files if file.strip())
+
+def submit_fetch(article: Article, fetch: Callable[[Article], Article],
+                 fetch_pool: ThreadPoolExecutor, file_pool: ThreadPoolExecutor) -> Future:
+    """
+    Submits an article's fetch, sending local files and URLs to separate pools.
+
+    Reading and parsing files is disk- and CPU-bound while URL fetches wait on the
+    network, so giving files their own pool lets both kinds progress at the same time.
+
+    Args:
+        article (Article): Article to fetch.
+        fetch (Callable[[Article], Article]): Fetches an article's content and returns it.
+        fetch_pool (ThreadPoolExecutor): Pool for URL articles.
+        file_pool (ThreadPoolExecutor): Pool for local file articles.
+
+    Returns:
+        Future: The pending fetch.
+    """
+    return (file_pool if article.file_path else fetch_pool).submit(fetch, article)
+
+def fetch_all(articles: List[Article], fetch: Callable[[Article], Article], fetch_workers: int = FETCH_WORKERS) -> None:
+    """
+    Fetches every article and waits for all of them to finish.
+
+    Args:
+        articles (List[Article]): Articles to fetch.
+        fetch (Callable[[Article], Article]): Fetches an article's content and returns it.
+        fetch_workers (int): Maximum number of URLs fetched at the same time.
+    """
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            ThreadPoolExecutor(max_workers=FILE_READ_WORKERS) as file_pool:
+        futures = [submit_fetch(article, fetch, fetch_pool, file_pool) for article in articles]
+        for future in futures:
+            future.result()
+
+def generate_cards_pipelined(
+    articles: Iterable[Article],
+    fetch: Callable[[Article], Article],
+    generate: Callable[[Article], Tuple[List[str], List[str]]],
+    fetch_workers: int = FETCH_WORKERS,
+    generation_workers: int = GENERATION_WORKERS,
+    max_in_flight: Optional[int] = None,
+) -> Iterator[Tuple[Article, Tuple[List[str], List[str]]]]:
+    """
+    Fetches articles and generates their cards in overlapping stages.
+
+    Fetches run in thread pools (one for URLs, one for local files) and generations in
+    another, so while the caller exports the cards of one article, later articles are
+    still being fetched and generated. Articles are taken from ``articles`` only as
+    earlier ones finish, so at most ``max_in_flight`` are held at once however long
+    the input is. Results are yielded in the order of ``articles``.
+
+    Args:
+        articles (Iterable[Article]): Articles to process.
+        fetch (Callable[[Article], Article]): Fetches an article's content and returns it.
+        generate (Callable[[Article], Tuple[List[str], List[str]]]): Generates cloze and basic cards for a fetched article.
+        fetch_workers (int): Maximum number of articles fetched at the same time.
+        generation_workers (int): Maximum number of card generation requests in flight at the same time.
+        max_in_flight (Optional[int]): Maximum number of articles submitted but not yet yielded.
+            Defaults to twice the number of workers, enough to keep every pool busy.
+
+    Yields:
+        Tuple[Article, Tuple[List[str], List[str]]]: Each article with its cloze and basic cards.
+    """
+    if max_in_flight is None:
+        max_in_flight = 2 * (fetch_workers + generation_workers)
+    fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers)
+    file_pool = ThreadPoolExecutor(max_workers=FILE_READ_WORKERS)
+    generation_pool = ThreadPoolExecutor(max_workers=generation_workers)
+    in_flight = deque()
+    try:
+        for article in articles:
+            fetched = submit_fetch(article, fetch, fetch_pool, file_pool)
+            in_flight.append((article, generation_pool.submit(lambda fetched=fetched: generate(fetched.result()))))
+            # Hand back finished results early, and wait for the oldest once the window is full
+            while in_flight and (len(in_flight) >= max_in_flight or in_flight[0][1].done()):
+                done_article, generated = in_flight.popleft()
+                yield done_article, generated.result()
+        while in_flight:
+            done_article, generated = in_flight.popleft()
+            yield done_article, generated.result()
+    finally:
+        # Don't keep fetching or paying for generations nobody will consume
+        fetch_pool.shutdown(cancel_futures=True)
+        file_pool.shutdown(cancel_futures=True)
+        generation_pool.shutdown(cancel_futures=True)
+
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Fetch articles and export Anki cards. Run 'articles-to-anki-setup' first if this is your first time.")
+    parser = argparse.ArgumentParser(prog="articles-to-anki", description="Fetch articles and export Anki cards. Run 'articles-to-anki-setup' first if this is your first time.")
     parser.add_argument(
         "--deck",
         type=str,
@@ -279,7 +429,12 @@ def main() -> None:
     parser.add_argument(
         "--use-cache",
         action="store_true",
-        help="Use cached content for URLs to avoid repeated fetching.",
+        help="Use cached content for URLs to avoid repeated fetching. Cached pages are reused without a request while Cache-Control max-age says they are fresh, and otherwise revalidated with the server when it supports ETag/Last-Modified.",
+    )
+    parser.add_argument(
+        "--use-llm-cache",
+        action="store_true",
+        help="Reuse cards generated earlier for byte-identical article text, prompt, and model instead of calling OpenAI again.",
     )
     parser.add_argument(
         "--to-file",
@@ -325,7 +480,53 @@ def main() -> None:
         default="gpt-4o-mini",
         help="OpenAI model to use for card generation (default: gpt-4o-mini). Examples: gpt-4o, gpt-4o-mini, gpt-4-turbo, gpt-3.5-turbo.",
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Generate cards for all articles with a single OpenAI Batch API job. Cheaper for large runs, but waits until the batch completes (up to 24 hours).",
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help="Reuse previously generated cards for near-identical articles (compared by embedding similarity). Requires numpy. Not used with --batch.",
+    )
+    parser.add_argument(
+        "--semantic-cache-threshold",
+        type=float,
+        default=SEMANTIC_CACHE_THRESHOLD,
+        help=f"Minimum cosine similarity for --semantic-cache to treat two articles as the same (0.0-1.0, default: {SEMANTIC_CACHE_THRESHOLD}). Lower values reuse cards more aggressively.",
+    )
+    parser.add_argument(
+        "--json-output",
+        action="store_true",
+        help="Ask the model for cards as schema-validated JSON instead of parsing its CLOZE/BASIC text output. Requires a model with structured output support (e.g. gpt-4o, gpt-4o-mini). Not used with --batch, or for articles sharing a request with --articles-per-request.",
+    )
+    parser.add_argument(
+        "--split-long-articles",
+        action="store_true",
+        help=f"Generate cards for articles longer than {ARTICLE_PART_TOKENS} tokens in parallel parts and merge the results, instead of trimming very long articles to their beginning and end. Not used with --batch.",
+    )
+    parser.add_argument(
+        "--articles-per-request",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Generate cards for up to N short articles in a single OpenAI request (default: 1). Reduces the number of requests when you hit requests-per-minute limits. Not used with --batch, --use-llm-cache, or --semantic-cache.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        metavar="N",
+        help=f"Maximum number of articles fetched and generated in parallel (default: {FETCH_WORKERS} fetches and {GENERATION_WORKERS} generations).",
+    )
     args = parser.parse_args()
+    if args.concurrency is not None and args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.articles_per_request < 1:
+        parser.error("--articles-per-request must be at least 1")
+    fetch_workers = args.concurrency or FETCH_WORKERS
+    generation_workers = args.concurrency or GENERATION_WORKERS
     if not args.to_file:
         check_anki_note_model()
     check_config()
@@ -334,18 +535,8 @@ def main() -> None:
     urls = []
     
     # Determine the correct path for the default URLs file
-    urls_file_path = URLS_FILE
-    article_dir_path = ARTICLE_DIR
-    
-    # Check if we need to adjust paths based on current directory
-    if not os.path.exists(ARTICLE_DIR):
-        if os.path.basename(os.getcwd()) == "articles" and os.path.exists("../articles"):
-            article_dir_path = "../articles"
-            urls_file_path = "../articles/urls.txt"
-        elif os.path.exists("../articles"):
-            article_dir_path = "../articles" 
-            urls_file_path = "../articles/urls.txt"
-    
+    article_dir_path, urls_file_path = resolve_article_paths()
+
     try:
         if os.path.exists(urls_file_path):
             with open(urls_file_path, "r") as f:
@@ -361,18 +552,27 @@ def main() -> None:
         additional_urls = read_urls_from_files(args.url_files)
         urls.extend(additional_urls)
         print(f"Total URLs loaded: {len(urls)}")
+
+    unique_urls = deduplicate_urls(urls)
+    if len(unique_urls) < len(urls):
+        print(f"Skipping {len(urls) - len(unique_urls)} duplicate URL(s).")
+        urls = unique_urls
     
     local_files = []
     if os.path.exists(article_dir_path):
-        local_files = [f for f in os.listdir(article_dir_path) if f.endswith(tuple(ALLOWED_EXTENSIONS)) and not f.startswith(".") and not f == os.path.basename(urls_file_path)]
+        urls_file_name = os.path.basename(urls_file_path)
+        with os.scandir(article_dir_path) as entries:
+            local_files = [
+                entry.name for entry in entries
+                if entry.name.endswith(ALLOWED_EXTENSIONS) and not entry.name.startswith(".") and entry.name != urls_file_name and entry.is_file()
+            ]
 
     if not urls and not local_files:
         print(f"No URLs or local files found in {urls_file_path} or {article_dir_path}.")
         print(f"Please add URLs to {urls_file_path}, specify additional URL files with --url-files, or add article files to {article_dir_path}, then run the script again.")
         return
 
-    articles = [Article(url=url) for url in urls if url.strip()]
-    articles += [Article(file_path=os.path.join(article_dir_path, file)) for file in local_files if file.strip()]
+    articles = iter_articles(urls, local_files, article_dir_path)
 
     # Get file handling choice once if exporting to file
     file_handling_choice = '1'  # Default value
@@ -384,20 +584,93 @@ def main() -> None:
     all_basic_cards = []
     total_cards_generated = 0
 
-    for article in articles:
-        article.fetch_content(use_cache=args.use_cache, skip_if_processed=(not args.process_all), model=args.model)
+    semantic_cache = None
+    if args.semantic_cache and not args.batch:
+        semantic_cache = SemanticCardCache(threshold=args.semantic_cache_threshold)
+
+    # A failing article is reported and skipped instead of aborting the whole run
+    failed_articles = set()
+
+    def fetch(article: Article) -> Article:
+        try:
+            article.fetch_content(use_cache=args.use_cache, skip_if_processed=(not args.process_all), model=args.model)
+        except Exception as e:
+            print(f"Error fetching {article.identifier}: {e}")
+            failed_articles.add(article.identifier)
+        return article
+
+    def generate(article: Article) -> Tuple[List[str], List[str]]:
+        if not article.text or (article.is_processed and not args.process_all):
+            return [], []
+        try:
+            return article.generate_cards(
+                custom_prompt=args.custom_prompt,
+                model=args.model,
+                semantic_cache=semantic_cache,
+                use_llm_cache=args.use_llm_cache,
+                chunk_tokens=ARTICLE_PART_TOKENS if args.split_long_articles else None,
+                json_output=args.json_output,
+            )
+        except Exception as e:
+            print(f"Error generating cards for \"{article.title or article.identifier}\": {e}")
+            failed_articles.add(article.identifier)
+            return [], []
+
+    def generate_group(group: List[Article]):
+        if len(group) == 1:
+            # Long articles end up alone in a group; give them the same options as the pipelined path
+            article = group[0]
+            return {article.identifier: generate(article)}
+        try:
+            return generate_cards_multi(group, custom_prompt=args.custom_prompt, model=args.model)
+        except Exception as e:
+            print(f"Error generating cards for {len(group)} articles: {e}")
+            failed_articles.update(article.identifier for article in group)
+            return {}
+
+    if args.batch:
+        # Fetch everything first, then submit all pending articles as one Batch API job
+        articles = list(articles)
+        fetch_all(articles, fetch, fetch_workers)
+        pending_articles = [article for article in articles if article.text and (args.process_all or not article.is_processed)]
+        batch_cards = generate_cards_batch(pending_articles, custom_prompt=args.custom_prompt, model=args.model)
+        results = ((article, batch_cards.get(article.identifier, ([], []))) for article in articles)
+    elif args.articles_per_request > 1 and not (args.use_llm_cache or args.semantic_cache):
+        # Fetch everything first so short articles can be grouped into shared requests
+        articles = list(articles)
+        fetch_all(articles, fetch, fetch_workers)
+        pending_articles = [article for article in articles if article.text and (args.process_all or not article.is_processed)]
+        groups = group_articles(pending_articles, args.articles_per_request, model=args.model)
+        grouped_cards = {}
+        with ThreadPoolExecutor(max_workers=generation_workers) as executor:
+            for cards in executor.map(generate_group, groups):
+                grouped_cards.update(cards)
+        results = ((article, grouped_cards.get(article.identifier, ([], []))) for article in articles)
+    else:
+        results = generate_cards_pipelined(articles, fetch, generate, fetch_workers, generation_workers)
+
+    pending_processed: List[Tuple[Article, str]] = []
+
+    def flush_processed() -> None:
+        Article.bulk_mark_processed(pending_processed)
+        pending_processed.clear()
+
+    # Still record finished articles if the run is interrupted part-way
+    atexit.register(flush_processed)
+
+    for article, (cloze_cards, basic_cards) in results:
+        if article.identifier in failed_articles:
+            continue
+
+        name = article.title or article.identifier
 
         # Skip already processed articles unless explicitly told to process all
         if article.is_processed and not args.process_all:
-            print(f"Skipping \"{article.title or article.identifier}\": already processed. Use --process-all to override.")
+            print(f"Skipping \"{name}\": already processed. Use --process-all to override.")
             continue
 
-        cloze_cards, basic_cards = [], []
-        if article.text:
-            cloze_cards, basic_cards = article.generate_cards(custom_prompt=args.custom_prompt, model=args.model)
-
         if not cloze_cards and not basic_cards:
-            print(f"No cards generated for \"{article.title or article.identifier}\". Please check the article content or your custom prompt.")
+            print(f"No cards generated for \"{name}\". Please check the article content or your custom prompt.")
             continue
 
         # Add article title headers to cards
@@ -413,10 +686,10 @@ def main() -> None:
                 all_basic_cards.extend(basic_cards)
             
             total_cards_generated += len(cloze_cards) + len(basic_cards)
-            print(f"Generated {len(cloze_cards)} cloze cards and {len(basic_cards)} basic cards for \"{article.title or article.identifier}\"")
+            print(f"Generated {len(cloze_cards)} cloze cards and {len(basic_cards)} basic cards for \"{name}\"")
         else:
             # Export directly to Anki
-            print(f"Exporting cards for \"{article.title or article.identifier}\"...")
+            print(f"Exporting cards for \"{name}\"...")
             exporter = ExportCards(
                 cloze_cards=cloze_cards,
                 basic_cards=basic_cards,
@@ -428,12 +701,23 @@ def main() -> None:
             )
             exporter.export()
 
-        # Mark the article as processed
-        article.mark_as_processed(args.deck)
+        # Mark the article as processed; the file is written once after the loop
+        pending_processed.append((article, args.deck))
 
-        print(f"Finished processing \"{article.title or article.identifier}\".")
+        print(f"Finished processing \"{name}\".")
         print("-" * 40)
 
+    flush_processed()
+    atexit.unregister(flush_processed)
+
+    if semantic_cache is not None:
+        semantic_cache.save()
+
+    if failed_articles:
+        print(f"Failed to process {len(failed_articles)} article(s); they were not marked as processed and will be retried next run:")
+        for identifier in sorted(failed_articles):
+            print(f"  - {identifier}")
+
     # Write all collected cards to files if using --to-file
     if args.to_file and (all_cloze_cards or all_basic_cards):
         print(f"\nWriting all {total_cards_generated} cards to files...")
@@ -1,8 +1,10 @@
+import functools
 import os
 import json
-from openai import OpenAI
 
-ANKICONNECT_URL = "http://localhost:8765"
+# 127.0.0.1 rather than localhost: resolving localhost can try IPv6 first, which
+# AnkiConnect doesn't listen on, and stall each new connection on some systems
+ANKICONNECT_URL = "http://127.0.0.1:8765"
 CLOZE_MODEL_NAME = "Cloze-Articles-to-Anki"
 BASIC_MODEL_NAME = "Basic-Articles-to-Anki"
 
@@ -11,7 +13,7 @@ MODEL = "gpt-4o-mini"
 
 ARTICLE_DIR = "articles"
 URLS_FILE = f"{ARTICLE_DIR}/urls.txt"
-ALLOWED_EXTENSIONS = {".pdf", ".xps", ".epub", ".mobi", ".fb2", ".cbz", ".svg", ".txt", ".md", ".docx", ".doc", ".pptx", ".ppt"}
+ALLOWED_EXTENSIONS = (".pdf", ".xps", ".epub", ".mobi", ".fb2", ".cbz", ".svg", ".txt", ".md", ".docx", ".doc", ".pptx", ".ppt")
 PROCESSED_ARTICLES_FILE = ".processed_articles.json"
 CARD_DATABASE_FILE = ".card_database.json"
 
@@ -20,10 +22,59 @@ CARD_DATABASE_FILE = ".card_database.json"
 # Lower values = more lenient duplicate detection (accept more variations as duplicates)
 SIMILARITY_THRESHOLD = 0.75
 
-# Initialize OpenAI client only if API key is available
-client = None
-if OPENAI_API_KEY:
-    client = OpenAI(api_key=OPENAI_API_KEY)
+# Maximum number of articles fetched at the same time. Fetching is network-bound,
+# so overlapping requests hides most of the per-URL round-trip latency.
+FETCH_WORKERS = 8
+
+# Local article files are read and parsed in their own pool, sized to the machine,
+# so they proceed alongside URL fetches instead of waiting for a network slot.
+FILE_READ_WORKERS = min(8, os.cpu_count() or 1)
+
+# Maximum number of card generation requests sent to OpenAI at the same time, and the
+# tokens- and requests-per-minute budgets they share. Lower TOKENS_PER_MINUTE and
+# REQUESTS_PER_MINUTE if your account tier has smaller limits for the selected model.
+GENERATION_WORKERS = 8
+TOKENS_PER_MINUTE = 200_000
+REQUESTS_PER_MINUTE = 500
+
+# Longer articles keep their beginning and end up to this many tokens, so a single request
+# stays within the model's context window instead of failing after paying for the input.
+MAX_ARTICLE_TOKENS = 100_000
+
+# With --split-long-articles, articles longer than this many tokens are generated in parts
+# of this size in parallel, and the cards of all parts are merged by one more request.
+ARTICLE_PART_TOKENS = 20_000
+
+# With --articles-per-request, short articles are grouped into one request up to this
+# many estimated input tokens, so fewer requests count against the requests-per-minute limit.
+MULTI_ARTICLE_MAX_TOKENS = 12_000
+
+# Exact-match cache of generated card output (--use-llm-cache)
+GENERATED_CACHE_DIR = ".generated_cache"
+# Cached output older than this is regenerated, so prompt and model improvements eventually apply
+GENERATED_CACHE_MAX_AGE_DAYS = 30
+
+# Semantic card cache (--semantic-cache): articles whose embeddings have at least this
+# cosine similarity to a previously processed article reuse its generated cards.
+CARD_CACHE_DIR = ".card_cache"
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_THRESHOLD = 0.97
+
+@functools.lru_cache(maxsize=None)
+def get_client():
+    """
+    Returns the shared OpenAI client, creating it on first use.
+
+    The OpenAI SDK is slow to import, so it is only loaded once a request is
+    actually about to be made, not for --help, configuration errors and the like.
+
+    Returns:
+        Optional[OpenAI]: The client, or None if OPENAI_API_KEY is not set.
+    """
+    if not OPENAI_API_KEY:
+        return None
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
 
 def get_processed_articles():
     """
@@ -63,9 +114,13 @@ def save_processed_articles(processed_articles):
     Args:
         processed_articles (dict): Dictionary of processed articles.
     """
+    # Write to a temporary file and rename it into place so an interrupted save
+    # can't leave a truncated file behind
+    temp_path = f"{PROCESSED_ARTICLES_FILE}.tmp"
     try:
-        with open(PROCESSED_ARTICLES_FILE, 'w') as f:
+        with open(temp_path, 'w') as f:
             json.dump(processed_articles, f, indent=2)
+        os.replace(temp_path, PROCESSED_ARTICLES_FILE)
     except IOError as e:
         print(f"Error saving {PROCESSED_ARTICLES_FILE}: {e}")
 
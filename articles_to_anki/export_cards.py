@@ -1,11 +1,77 @@
+import atexit
+import functools
 import os
+import re
 import requests
 import json
 import uuid
-from datetime import datetime
-from typing import List, Dict, Any, Optional
-from articles_to_anki.config import ANKICONNECT_URL, BASIC_MODEL_NAME, CLOZE_MODEL_NAME, SIMILARITY_THRESHOLD, get_card_database, save_card_database
-from articles_to_anki.text_utils import are_cards_similar
+from typing import List, Dict, Any, Optional, TextIO
+from articles_to_anki import anki_connect
+from articles_to_anki.config import BASIC_MODEL_NAME, CLOZE_MODEL_NAME, SIMILARITY_THRESHOLD, get_card_database, save_card_database
+from articles_to_anki.text_utils import are_normalized_cards_similar, normalize_card
+
+# Whitespace and path separators become underscores in tags; other punctuation is dropped
+_TAG_SEPARATORS = str.maketrans({c: "_" for c in " \t\r\n/\\"})
+_TAG_INVALID_CHARS = re.compile(r"[^\w-]")
+
+
+EXPORT_DIR = "exported_cards"
+
+# Export files stay open for the whole run, keyed by (absolute path, is_cloze)
+_FILE_HANDLES: Dict[tuple, TextIO] = {}
+
+
+def _close_file_handles() -> None:
+    """Flushes and closes every export file opened during the run."""
+    for handle in _FILE_HANDLES.values():
+        try:
+            handle.close()
+        except OSError as e:
+            print(f"Error closing {handle.name}: {e}")
+    _FILE_HANDLES.clear()
+
+
+atexit.register(_close_file_handles)
+
+
+def _get_handle(is_cloze: bool) -> TextIO:
+    """
+    Returns the append handle for the cloze or basic export file, opening it on first use.
+
+    Args:
+        is_cloze (bool): Whether the handle is for cloze cards.
+
+    Returns:
+        TextIO: A buffered handle that is closed when the process exits.
+    """
+    directory = os.path.abspath(EXPORT_DIR)
+    key = (directory, is_cloze)
+    handle = _FILE_HANDLES.get(key)
+    if handle is None:
+        os.makedirs(directory, exist_ok=True)
+        file_name = "cloze_cards.txt" if is_cloze else "basic_cards.txt"
+        handle = open(os.path.join(directory, file_name), "a", encoding="utf-8", buffering=1 << 16)
+        _FILE_HANDLES[key] = handle
+    return handle
+
+
+@functools.lru_cache(maxsize=128)
+def title_tag(title: str) -> str:
+    """
+    Converts an article title into an Anki tag.
+
+    Every card of an article shares its tag, so the result is cached per title.
+
+    Args:
+        title (str): The article title.
+
+    Returns:
+        str: The title with separators replaced by underscores and any other character that
+        isn't a letter, digit, underscore or hyphen removed, or "imported_card" if nothing is left.
+    """
+    tag = _TAG_INVALID_CHARS.sub("", title.translate(_TAG_SEPARATORS))
+    return tag or "imported_card"
+
 
 class ExportCards:
     """
@@ -22,6 +88,12 @@ class ExportCards:
         duplicate_file (str): Path to the file storing card hashes.
     """
 
+    # One instance is created per article; slots avoid a per-instance __dict__
+    __slots__ = (
+        "cloze_cards", "basic_cards", "title", "deck", "to_file", "skip_duplicates",
+        "similarity_threshold", "cards_exported", "cards_skipped", "card_database", "existing_cards",
+    )
+
     def __init__(self, cloze_cards: List[str], basic_cards: List[str], title: str, deck: str, to_file: bool = False,
                  skip_duplicates: bool = True, similarity_threshold: float = SIMILARITY_THRESHOLD):
         self.cloze_cards = cloze_cards
@@ -36,7 +108,9 @@ class ExportCards:
         # Load the card database
         self.card_database = get_card_database()
         # Process existing cards for comparison
-        self.existing_cards = []  # List of tuples (card_content, is_cloze)
+        # List of tuples (card_content, is_cloze, normalized_content); each card is
+        # normalized once here rather than on every comparison
+        self.existing_cards = []
 
     def _preload_existing_cards(self):
         """
@@ -53,13 +127,15 @@ class ExportCards:
 
             if is_cloze:
                 front = card.get("front", "")
-                self.existing_cards.append(((front, ""), True))
+                self._remember_card((front, ""), True)
             else:  # basic
                 front = card.get("front", "")
                 back = card.get("back", "")
-                self.existing_cards.append(((front, back), False))
-
+                self._remember_card((front, back), False)
 
+    def _remember_card(self, card_content: tuple[str, str], is_cloze: bool) -> None:
+        """Adds a card to the set later cards are checked against for duplicates."""
+        self.existing_cards.append((card_content, is_cloze, normalize_card(card_content, is_cloze)))
 
     def _is_duplicate(self, card_content: tuple[str, str], is_cloze: bool) -> bool:
         """
@@ -84,12 +160,13 @@ class ExportCards:
             self._preload_existing_cards()
 
         try:
+            normalized = normalize_card(card_content, is_cloze)
             # Check for semantic similarity with existing cards
-            for existing_content, existing_is_cloze in self.existing_cards:
+            for _, existing_is_cloze, existing_normalized in self.existing_cards:
                 # Only compare cards of the same type (cloze to cloze, basic to basic)
                 if is_cloze == existing_is_cloze:
                     try:
-                        if are_cards_similar(card_content, existing_content, is_cloze, self.similarity_threshold):
+                        if are_normalized_cards_similar(normalized, existing_normalized, is_cloze, self.similarity_threshold):
                             return True
                     except Exception as e:
                         # Don't let similarity errors fail the whole process
@@ -115,16 +192,17 @@ class ExportCards:
                 self._preload_existing_cards()
 
             if self.to_file:
-                # File export is now handled by CLI centrally
-                print("Warning: File export should be handled by CLI, not ExportCards")
-                return
+                self._export_to_file(self.cloze_cards, self.title, is_cloze=True)
+                self._export_to_file(self.basic_cards, self.title, is_cloze=False)
             else:
+                # Collect every card first so they can be sent in one AnkiConnect request
+                cards: List[tuple[str, str, bool]] = []
                 for card in self.cloze_cards:
                     try:
                         # Clean up malformed cloze cards - extract only the cloze part
                         front = self._clean_cloze_card(card)
                         if front:
-                            self._export_to_anki(front, "", True)
+                            cards.append((front, "", True))
                     except Exception as e:
                         print(f"Error exporting cloze card: {e}")
                         continue
@@ -134,11 +212,13 @@ class ExportCards:
                         # Clean up basic cards and extract front/back
                         front, back = self._clean_basic_card(card)
                         if front:
-                            self._export_to_anki(front, back, False)
+                            cards.append((front, back, False))
                     except Exception as e:
                         print(f"Error exporting basic card: {e}")
                         continue
 
+                self._export_notes_to_anki(cards)
+
             # Save updated card database
             try:
                 save_card_database(self.card_database)
@@ -150,22 +230,26 @@ class ExportCards:
             print(f"Error during export: {e}")
             print(f"Successfully exported {self.cards_exported} cards before the error.")
 
-    def _export_to_anki(self, front: str, back: str, is_cloze: bool) -> None:
+    def _prepare_note(self, front: str, back: str, is_cloze: bool) -> Optional[tuple[Dict[str, Any], str]]:
         """
-        Exports a single card to Anki via AnkiConnect.
+        Validates a card and builds the AnkiConnect note for it.
+
+        Returns:
+            Optional[tuple[Dict[str, Any], str]]: The note and the (possibly repaired) front text,
+            or None if the card should not be added.
         """
         # Skip empty cards
         if not front.strip():
             print("Skipping empty card")
-            return
+            return None
 
         # Check for duplicates if needed
-        card_content = (front, back) if not is_cloze else (front, "")
+        card_content = self._card_content(front, back, is_cloze)
 
         try:
             if self.skip_duplicates and self._is_duplicate(card_content, is_cloze):
                 self.cards_skipped += 1
-                return
+                return None
         except Exception as e:
             print(f"Error checking for duplicates: {e}")
             print("Continuing with export")
@@ -191,18 +275,14 @@ class ExportCards:
                             break
                     if "{{c" not in front:
                         print("Error: Cloze card is missing cloze markers ({{c1::...}})")
-                        return
+                        return None
                 else:
                     print("Error: Cloze card is missing cloze markers ({{c1::...}})")
-                    return
+                    return None
 
         model_name = CLOZE_MODEL_NAME if is_cloze else BASIC_MODEL_NAME
         # Sanitize tags to avoid AnkiConnect errors
-        safe_tag = self.title.replace(" ", "_").replace("/", "_")
-        # Remove any characters that might cause issues in tags
-        safe_tag = ''.join(c for c in safe_tag if c.isalnum() or c in '_-')
-        if not safe_tag:
-            safe_tag = "imported_card"
+        safe_tag = title_tag(self.title)
 
         # Prepare the note
         note = {
@@ -210,7 +290,7 @@ class ExportCards:
             "modelName": model_name,
             "fields": {},  # Will be set below
             "options": {
-                "allowDuplicate": False
+                "allowDuplicate": not self.skip_duplicates
             },
             "tags": [safe_tag]
         }
@@ -225,6 +305,124 @@ class ExportCards:
         else:
             # Basic model expects 'Front' and 'Back'
             note["fields"] = {"Front": front, "Back": back}
+        return note, front
+
+    @staticmethod
+    def _card_content(front: str, back: str, is_cloze: bool) -> tuple[str, str]:
+        """Returns the card content used for duplicate detection."""
+        return (front, back) if not is_cloze else (front, "")
+
+    def _record_card(self, front: str, back: str, is_cloze: bool) -> None:
+        """Stores a successfully added card in the card database."""
+        card_data = {
+            "id": str(uuid.uuid4()),
+            "type": "cloze" if is_cloze else "basic",
+            "front": front,
+            "back": back if not is_cloze else "",
+            "deck": self.deck,
+            "title": self.title
+        }
+        if "cards" not in self.card_database:
+            self.card_database["cards"] = []
+        self.card_database["cards"].append(card_data)
+        self.cards_exported += 1
+
+    def _export_notes_to_anki(self, cards: List[tuple[str, str, bool]]) -> None:
+        """
+        Exports cards to Anki with a single AnkiConnect addNotes request.
+
+        Args:
+            cards (List[tuple[str, str, bool]]): Cards as (front, back, is_cloze) tuples.
+        """
+        notes: List[Dict[str, Any]] = []
+        prepared: List[tuple[str, str, bool]] = []
+        queued_from = len(self.existing_cards)
+        for front, back, is_cloze in cards:
+            try:
+                prepared_note = self._prepare_note(front, back, is_cloze)
+            except Exception as e:
+                print(f"Error preparing {'cloze' if is_cloze else 'basic'} card: {e}")
+                continue
+            if prepared_note is None:
+                continue
+            note, front = prepared_note
+            notes.append(note)
+            prepared.append((front, back, is_cloze))
+            # Later cards in this batch are compared against the ones already queued
+            self._remember_card(self._card_content(front, back, is_cloze), is_cloze)
+
+        if not notes:
+            return
+
+        payload = {
+            "action": "addNotes",
+            "version": 6,
+            "params": {
+                "notes": notes
+            }
+        }
+        added = [False] * len(notes)
+        try:
+            response = anki_connect.post(payload, timeout=30)
+            response.raise_for_status()
+            result = anki_connect.parse(response)
+            note_ids = result.get("result")
+            # Newer AnkiConnect versions report per-note failures in "error" alongside the ids
+            if result.get("error") is not None:
+                print(f"AnkiConnect error: {result['error']}")
+            if not isinstance(note_ids, list):
+                # Newer AnkiConnect versions fail the whole request if any note fails. Without
+                # duplicates allowed, resending note by note can't add anything twice.
+                if self.skip_duplicates:
+                    print("Retrying the cards one at a time...")
+                    for index, (note, (front, back, is_cloze)) in enumerate(zip(notes, prepared)):
+                        added[index] = self._send_note(note, front, back, is_cloze)
+                return
+            for index, ((front, back, is_cloze), note_id) in enumerate(zip(prepared, note_ids)):
+                if note_id is not None:
+                    self._record_card(front, back, is_cloze)
+                    added[index] = True
+            failed = [index for index, was_added in enumerate(added) if not was_added]
+            if failed:
+                # Resend rejected notes individually to learn why each one failed
+                print(f"Anki rejected {len(failed)} of {len(notes)} cards; retrying them individually.")
+                for index in failed:
+                    front, back, is_cloze = prepared[index]
+                    added[index] = self._send_note(notes[index], front, back, is_cloze)
+        except requests.exceptions.Timeout:
+            print("AnkiConnect request timed out. Check if Anki is running.")
+        except requests.exceptions.ConnectionError:
+            print("Connection error. Make sure Anki is running with AnkiConnect addon.")
+        except Exception as e:
+            print(f"Failed to export cards to Anki: {e}")
+        finally:
+            # Only cards Anki actually accepted count as existing for the rest of the run
+            queued = self.existing_cards[queued_from:]
+            self.existing_cards[queued_from:] = [entry for entry, was_added in zip(queued, added) if was_added]
+            not_added = added.count(False)
+            if not_added:
+                print(f"{not_added} of {len(notes)} cards were not added to Anki.")
+
+    def _export_to_anki(self, front: str, back: str, is_cloze: bool) -> None:
+        """
+        Exports a single card to Anki via AnkiConnect.
+
+        Batches go through _export_notes_to_anki; this is the single-card path.
+        """
+        prepared_note = self._prepare_note(front, back, is_cloze)
+        if prepared_note is None:
+            return
+        note, front = prepared_note
+        if self._send_note(note, front, back, is_cloze):
+            self._remember_card(self._card_content(front, back, is_cloze), is_cloze)
+
+    def _send_note(self, note: Dict[str, Any], front: str, back: str, is_cloze: bool) -> bool:
+        """
+        Sends a single prepared note to Anki with addNote, reporting why it failed if it does.
+
+        Returns:
+            bool: True if the note was added.
+        """
         payload = {
             "action": "addNote",
             "version": 6,
@@ -233,19 +431,19 @@ class ExportCards:
             }
         }
         try:
-            response = requests.post(ANKICONNECT_URL, json=payload, timeout=30)
+            response = anki_connect.post(payload, timeout=30)
             response.raise_for_status()
-            result = response.json()
+            result = anki_connect.parse(response)
             if result.get("error") is not None:
                 error_msg = result['error']
                 # Handle specific error cases
                 if "duplicate" in error_msg.lower():
                     print(f"Skipping duplicate card: {front[:50]}...")
                     self.cards_skipped += 1
-                    return
+                    return False
                 elif "empty" in error_msg.lower():
                     print(f"Card has empty fields: {front[:50]}...")
-                    return
+                    return False
                 else:
                     # Log detailed information for debugging
                     print(f"AnkiConnect error: {error_msg}")
@@ -254,28 +452,15 @@ class ExportCards:
                     # Check for missing cloze markers in cloze cards
                     if is_cloze and "{{c" not in front:
                         print("Error: Cloze card is missing cloze markers ({{c1::...}})")
-                        return
+                        return False
 
                     # Try to diagnose other common issues
                     if len(front) > 1000:
                         print("Warning: Card front text is very long (over 1000 chars)")
-            else:
-                # Successfully added note, store the card in our database
-                card_data = {
-                    "id": str(uuid.uuid4()),
-                    "type": "cloze" if is_cloze else "basic",
-                    "front": front,
-                    "back": back if not is_cloze else "",
-                    "deck": self.deck,
-                    "title": self.title
-                }
-                # Add to existing cards list for duplicate detection
-                self.existing_cards.append((card_content, is_cloze))
-                # Add to database
-                if "cards" not in self.card_database:
-                    self.card_database["cards"] = []
-                self.card_database["cards"].append(card_data)
-                self.cards_exported += 1
+                    return False
+            # Successfully added note, store the card in our database
+            self._record_card(front, back, is_cloze)
+            return True
         except requests.exceptions.Timeout:
             print("AnkiConnect request timed out. Check if Anki is running.")
         except requests.exceptions.ConnectionError:
@@ -285,11 +470,18 @@ class ExportCards:
             # Print some debugging information
             print(f"Card type: {'Cloze' if is_cloze else 'Basic'}")
             print(f"Card front length: {len(front)} characters")
+        return False
+
 
 
+    def _export_to_file(self, cards: List[str], title: str, is_cloze: bool) -> None:
+        """
+        Exports cards to a file in the 'exported_cards' directory.
 
-    def _export_to_file(self, cards: List[str], title: str, is_cloze: bool, file_path: str, mode: str = 'a') -> None:
-        """Exports cards to a file in the 'exported_cards' directory."""
+        The file is opened once per run and kept open, so exporting many articles
+        appends to the same buffered handle instead of reopening the file each time.
+        The handle is flushed once per call, before the cards count as exported.
+        """
         try:
             # Filter out empty cards before processing
             non_empty_cards = [card for card in cards if card.strip()]
@@ -298,69 +490,72 @@ class ExportCards:
                 return
 
             exported_count = 0
+            tag = title_tag(title)
+            lines = [f"# {title}\n"]
 
-            with open(file_path, mode, encoding="utf-8") as f:
-                f.write(f"# {title}\n")
-                for card in non_empty_cards:
-                    try:
+            for card in non_empty_cards:
+                try:
 
-                        # For processing, parse the card content
-                        if is_cloze:
-                            front = self._clean_cloze_card(card)
-                            back = ""
-                            card_content = (front, back)
-                        else:
-                            front, back = self._clean_basic_card(card)
-                            card_content = (front, back)
-
-                        # Check for semantic duplicates
-                        try:
-                            if self.skip_duplicates and self._is_duplicate(card_content, is_cloze):
-                                self.cards_skipped += 1
-                                continue
-                        except Exception as e:
-                            print(f"Error checking for duplicates: {e}")
-                            print("Continuing with export")
-
-                        # Write the cleaned card content to file
-                        # Replace spaces with underscores in title for tags
-                        title_tag = title.replace(" ", "_")
-                        if is_cloze:
-                            # Use the cleaned cloze card front with extra empty field and title tag
-                            f.write(f"{front} ; ; {title_tag}\n")
-                        else:
-                            # Use the cleaned basic card front and back with title tag
-                            if back:
-                                f.write(f"{front} ; {back} ; {title_tag}\n")
-                            else:
-                                f.write(f"{front} ;  ; {title_tag}\n")
-
-                        # Store the card in our database
-                        card_front, card_back = card_content
-                        if card_front:  # Only store non-empty cards
-                            card_data = {
-                                "id": str(uuid.uuid4()),
-                                "type": "cloze" if is_cloze else "basic",
-                                "front": card_front,
-                                "back": card_back,
-                                "title": title
-                            }
-
-                            # Add to existing cards list for duplicate detection
-                            self.existing_cards.append((card_content, is_cloze))
-
-                            # Add to database
-                            if "cards" not in self.card_database:
-                                self.card_database["cards"] = []
-                            self.card_database["cards"].append(card_data)
-
-                            exported_count += 1
-                            self.cards_exported += 1
-                    except Exception as e:
-                        print(f"Error processing card: {e}")
-                        continue
+                    # For processing, parse the card content
+                    if is_cloze:
+                        front = self._clean_cloze_card(card)
+                        back = ""
+                        card_content = (front, back)
+                    else:
+                        front, back = self._clean_basic_card(card)
+                        card_content = (front, back)
 
-            print(f"Exported {exported_count} {'cloze' if is_cloze else 'basic'} cards to {file_path}.")
+                    # Check for semantic duplicates
+                    try:
+                        if self.skip_duplicates and self._is_duplicate(card_content, is_cloze):
+                            self.cards_skipped += 1
+                            continue
+                    except Exception as e:
+                        print(f"Error checking for duplicates: {e}")
+                        print("Continuing with export")
+
+                    # Queue the cleaned card content; the file is written once at the end
+                    if is_cloze:
+                        # Use the cleaned cloze card front with extra empty field and title tag
+                        lines.append(f"{front} ; ; {tag}\n")
+                    else:
+                        # Use the cleaned basic card front and back with title tag
+                        if back:
+                            lines.append(f"{front} ; {back} ; {tag}\n")
+                        else:
+                            lines.append(f"{front} ;  ; {tag}\n")
+
+                    # Store the card in our database
+                    card_front, card_back = card_content
+                    if card_front:  # Only store non-empty cards
+                        card_data = {
+                            "id": str(uuid.uuid4()),
+                            "type": "cloze" if is_cloze else "basic",
+                            "front": card_front,
+                            "back": card_back,
+                            "title": title
+                        }
+
+                        # Add to existing cards list for duplicate detection
+                        self._remember_card(card_content, is_cloze)
+
+                        # Add to database
+                        if "cards" not in self.card_database:
+                            self.card_database["cards"] = []
+                        self.card_database["cards"].append(card_data)
+
+                        exported_count += 1
+                        self.cards_exported += 1
+                except Exception as e:
+                    print(f"Error processing card: {e}")
+                    continue
+
+            handle = _get_handle(is_cloze)
+            handle.write("".join(lines))
+            # The cards are recorded as exported, so they must reach the file now, not at exit
+            handle.flush()
+
+            print(f"Exported {exported_count} {'cloze' if is_cloze else 'basic'} cards to {handle.name}.")
         except Exception as e:
             print(f"Error exporting cards to file: {e}")
 
@@ -372,17 +567,16 @@ class ExportCards:
 
         # Remove title suffix if present (new format: front ; ; title)
         if " ; ; " in card:
-            card = card.split(" ; ; ")[0].strip()
+            card = card.partition(" ; ; ")[0].strip()
         elif " ; ; ; " in card:
             # Handle old format with triple separator
-            card = card.split(" ; ; ; ")[0].strip()
+            card = card.partition(" ; ; ; ")[0].strip()
 
         # Remove any remaining trailing semicolons and spaces
         card = card.rstrip(" ;")
 
         # Extract only the cloze part before any remaining semicolon
-        if " ; " in card:
-            card = card.split(" ; ")[0].strip()
+        card = card.partition(" ; ")[0].strip()
 
         # Validate it's actually a cloze card
         if "{{c" not in card or "}}" not in card:
@@ -397,24 +591,22 @@ class ExportCards:
             return "", ""
 
         # Handle new format: front ; back ; title
-        parts = card.split(" ; ")
-        if len(parts) >= 3:
+        front, separator, rest = card.partition(" ; ")
+        back, title_separator, _ = rest.partition(" ; ")
+        if title_separator:
             # New format with title tag - take first two parts
-            front = parts[0].strip()
-            back = parts[1].strip()
             # Handle case where back field is empty (front ; ; title)
-            # In this case, parts[1] will be empty string
-            return front, back
+            # In this case, back will be empty string
+            return front.strip(), back.strip()
         elif " ; ; ; " in card:
             # Old format with multiple separators
-            parts = card.split(" ; ; ; ")
-            card = parts[0].strip()
+            card = card.partition(" ; ; ; ")[0].strip()
+            front, separator, rest = card.partition(" ; ")
 
         # Split on the first " ; " to get front and back
-        if " ; " in card:
-            parts = card.split(" ; ", 1)
-            front = parts[0].strip()
-            back = parts[1].strip() if len(parts) > 1 else ""
+        if separator:
+            front = front.strip()
+            back = rest.strip()
 
             # Remove any trailing semicolons from back
             back = back.rstrip(" ;")
@@ -0,0 +1,117 @@
+import threading
+import time
+from typing import Any, Callable, Optional, TYPE_CHECKING
+
+from articles_to_anki.config import REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE
+
+if TYPE_CHECKING:
+    from openai import RateLimitError
+
+# Backoff bounds, in seconds, for requests rejected with HTTP 429
+INITIAL_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to keep concurrent OpenAI requests within a
+    tokens-per-minute budget.
+
+    The bucket starts full and refills continuously at ``tokens_per_minute / 60``
+    tokens per second. Callers block in ``acquire`` until enough tokens are available.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        """
+        Initialize the bucket.
+
+        Args:
+            tokens_per_minute (int): Maximum number of tokens that may be consumed per minute.
+        """
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Blocks until ``tokens`` tokens are available, then consumes them.
+
+        Requests larger than the bucket capacity are clamped to the capacity so they
+        wait for a full bucket instead of blocking forever.
+
+        Args:
+            tokens (int): Estimated number of tokens the request will use.
+        """
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared across threads and modules so all concurrent OpenAI requests, chat and embeddings alike,
+# stay within the account's token and request budgets
+token_limiter = TokenBucket(TOKENS_PER_MINUTE)
+request_limiter = TokenBucket(REQUESTS_PER_MINUTE)
+
+
+def acquire_rate_limits(tokens: int) -> None:
+    """
+    Blocks until one more OpenAI request using about ``tokens`` tokens fits within the per-minute limits.
+
+    Args:
+        tokens (int): Estimated number of tokens the request will use.
+    """
+    request_limiter.acquire(1)
+    token_limiter.acquire(tokens)
+
+
+def _retry_after(error: "RateLimitError") -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def call_with_backoff(func: Callable[..., Any], *args: Any, max_retries: int = 6, **kwargs: Any) -> Any:
+    """
+    Calls an OpenAI API function, retrying with exponential backoff when it is rate limited.
+
+    The server's ``Retry-After`` header is honoured when present; otherwise the delay
+    starts at one second and doubles on each retry, up to 30 seconds.
+
+    Args:
+        func (Callable[..., Any]): The API function to call, e.g. ``client.chat.completions.create``.
+        max_retries (int): Number of retries before the rate limit error is re-raised.
+
+    Returns:
+        Any: The return value of ``func``.
+    """
+    delay = INITIAL_RETRY_DELAY
+    # Imported here so importing this module doesn't load the OpenAI SDK
+    from openai import RateLimitError
+
+    for attempt in range(max_retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except RateLimitError as e:
+            if attempt == max_retries:
+                raise
+            wait = _retry_after(e)
+            wait = min(wait if wait is not None else delay, MAX_RETRY_DELAY)
+            print(f"Rate limited by OpenAI; retrying in {wait:.1f}s...")
+            time.sleep(wait)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
@@ -19,6 +19,12 @@ SIMPLE_STOPWORDS = {
     "own", "same", "so", "than", "too", "very", "s", "t", "will", "can"
 }
 
+# Patterns used on every card comparison, compiled once
+_WORD_PATTERN = re.compile(r"[a-zA-Z0-9_\'\-]+")
+_PUNCTUATION_PATTERN = re.compile(r'[^\w\s\']')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_CLOZE_PATTERN = re.compile(r'\{\{c\d+::(.+?)\}\}')
+
 # Try to import advanced NLP libraries for better similarity detection
 # If not available, fall back to simple implementations
 USE_ADVANCED_NLP = False
@@ -29,11 +35,10 @@ stop_words = set()
 # Define simple helper functions
 def simple_word_tokenize(text):
     """Simple word tokenizer that doesn't depend on NLTK"""
-    import re
     # More robust tokenization that preserves words with apostrophes
     tokens = []
     # First split on whitespace and punctuation except apostrophes
-    for word in re.findall(r"[a-zA-Z0-9_\'\-]+", text.lower()):
+    for word in _WORD_PATTERN.findall(text.lower()):
         # Further clean up the word
         word = word.strip("'\".,;:!?()-")
         if word:
@@ -122,10 +127,10 @@ def normalize_text(text: str) -> str:
         text = text.lower()
 
         # Remove punctuation and special characters (but preserve apostrophes)
-        text = re.sub(r'[^\w\s\']', ' ', text)
+        text = _PUNCTUATION_PATTERN.sub(' ', text)
 
         # Replace multiple spaces with a single space
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_PATTERN.sub(' ', text)
     except Exception:
         # Ultra-safe fallback if regex fails
         text = text.lower()
@@ -171,7 +176,7 @@ def extract_cloze_content(cloze_text: str) -> str:
         str: Text with cloze markers replaced by their content
     """
     # Replace cloze markers like {{c1::text}} with just 'text'
-    return re.sub(r'\{\{c\d+::(.+?)\}\}', r'\1', cloze_text)
+    return _CLOZE_PATTERN.sub(r'\1', cloze_text)
 
 def calculate_similarity(text1: str, text2: str) -> float:
     """
@@ -298,14 +303,32 @@ def normalize_basic_card(front: str, back: str) -> tuple[str, str]:
     """
     return normalize_text(front), normalize_text(back)
 
-def are_cards_similar(card1: tuple[str, str], card2: tuple[str, str],
-                     is_cloze: bool, threshold: float = 0.85) -> bool:
+def normalize_card(card: tuple[str, str], is_cloze: bool) -> tuple[str, str]:
     """
-    Determine if two cards are semantically similar.
+    Normalize a card for similarity comparison.
 
     Args:
-        card1 (tuple[str, str]): First card as (content, "") for cloze or (front, back) for basic.
-        card2 (tuple[str, str]): Second card as (content, "") for cloze or (front, back) for basic.
+        card (tuple[str, str]): The card as (content, "") for cloze or (front, back) for basic.
+        is_cloze (bool): Whether this is a cloze card.
+
+    Returns:
+        tuple[str, str]: The normalized card, in the same shape as the input.
+    """
+    if is_cloze:
+        return normalize_cloze_card(card[0]), ""
+    return normalize_basic_card(card[0], card[1])
+
+def are_normalized_cards_similar(card1: tuple[str, str], card2: tuple[str, str],
+                                 is_cloze: bool, threshold: float = 0.85) -> bool:
+    """
+    Determine if two cards already passed through normalize_card are similar.
+
+    Normalizing is the expensive part of a comparison, so callers checking one card
+    against many can normalize each card once and compare with this.
+
+    Args:
+        card1 (tuple[str, str]): First normalized card.
+        card2 (tuple[str, str]): Second normalized card.
         is_cloze (bool): Whether these are cloze cards.
         threshold (float): Similarity threshold to consider cards as duplicates.
 
@@ -314,14 +337,12 @@ def are_cards_similar(card1: tuple[str, str], card2: tuple[str, str],
     """
     if is_cloze:
         # For cloze cards, compare the normalized text (with cloze markers removed)
-        text1 = normalize_cloze_card(card1[0])
-        text2 = normalize_cloze_card(card2[0])
-        return calculate_similarity(text1, text2) >= threshold
+        return calculate_similarity(card1[0], card2[0]) >= threshold
     else:
         # For basic cards, compare the normalized question (front)
         # and optionally the answer if front is very similar
-        front1, back1 = normalize_basic_card(card1[0], card1[1])
-        front2, back2 = normalize_basic_card(card2[0], card2[1])
+        front1, back1 = card1
+        front2, back2 = card2
 
         # Check front similarity first
         front_similarity = calculate_similarity(front1, front2)
@@ -337,3 +358,21 @@ def are_cards_similar(card1: tuple[str, str], card2: tuple[str, str],
             return combined_similarity >= threshold
 
         return False
+
+def are_cards_similar(card1: tuple[str, str], card2: tuple[str, str],
+                     is_cloze: bool, threshold: float = 0.85) -> bool:
+    """
+    Determine if two cards are semantically similar.
+
+    Args:
+        card1 (tuple[str, str]): First card as (content, "") for cloze or (front, back) for basic.
+        card2 (tuple[str, str]): Second card as (content, "") for cloze or (front, back) for basic.
+        is_cloze (bool): Whether these are cloze cards.
+        threshold (float): Similarity threshold to consider cards as duplicates.
+
+    Returns:
+        bool: True if cards are similar above the threshold, False otherwise.
+    """
+    return are_normalized_cards_similar(
+        normalize_card(card1, is_cloze), normalize_card(card2, is_cloze), is_cloze, threshold
+    )
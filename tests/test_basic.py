@@ -79,6 +79,446 @@ class TestArticle:
         assert article.url == "https://example.com/test"
 
 
+class TestArticleCache:
+    """Test revalidation of cached URL articles (--use-cache)."""
+
+    HTML = b"<html><head><title>Cached Title</title></head><body><article>" + b"<p>Some article text here.</p>" * 40 + b"</article></body></html>"
+
+    @staticmethod
+    def _response(status_code, content=b"", headers=None):
+        response = MagicMock(status_code=status_code, content=content, text=content.decode(), headers=headers or {})
+        response.raise_for_status = MagicMock()
+        return response
+
+    def _fetch(self, get):
+        from articles_to_anki import articles
+
+        with patch.object(articles._session, "get", side_effect=get) as mock_get:
+            article = Article(url="https://example.com/cached")
+            article._fetch_from_url_or_cache(use_cache=True)
+        return article, mock_get
+
+    def test_revalidation(self):
+        """Test the 304, updated-content and network-failure paths."""
+        import requests
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original_cwd = os.getcwd()
+            try:
+                os.chdir(temp_dir)
+
+                article, _ = self._fetch(lambda *args, **kwargs: self._response(200, self.HTML, {"ETag": '"v1"'}))
+                assert article.title == "Cached Title"
+                cached_text = article.text
+
+                # Not modified: the cached copy is reused and the validator is sent
+                article, mock_get = self._fetch(lambda *args, **kwargs: self._response(304))
+                assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+                assert article.text == cached_text
+
+                # Offline: fall back to the cached copy instead of failing
+                def offline(*args, **kwargs):
+                    raise requests.exceptions.ConnectionError("offline")
+                article, _ = self._fetch(offline)
+                assert article.title == "Cached Title"
+                assert article.text == cached_text
+
+                # Changed: the new content replaces the cached copy, along with its validator
+                updated = self.HTML.replace(b"Cached Title", b"New Title")
+                article, _ = self._fetch(lambda *args, **kwargs: self._response(200, updated, {"ETag": '"v2"'}))
+                assert article.title == "New Title"
+                article, mock_get = self._fetch(lambda *args, **kwargs: self._response(304))
+                assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v2"'}
+                assert article.title == "New Title"
+            finally:
+                os.chdir(original_cwd)
+
+    def test_cache_meta_freshness(self):
+        """Test how Cache-Control and Age headers turn into a freshness deadline."""
+        import time
+        from requests.structures import CaseInsensitiveDict
+        from articles_to_anki.articles import _cache_meta
+
+        def fresh_until(**headers):
+            return _cache_meta(CaseInsensitiveDict({key.replace("_", "-"): value for key, value in headers.items()}))["fresh_until"]
+
+        now = time.time()
+        assert 3590 < fresh_until(Cache_Control="public, max-age=3600") - now <= 3601
+        assert 3490 < fresh_until(Cache_Control="max-age=3600", Age="100") - now <= 3501
+        assert 3590 < fresh_until(Cache_Control="MAX-AGE=3600", Age="soon") - now <= 3601
+        assert fresh_until(Cache_Control="max-age=0") <= time.time()
+        assert fresh_until(Cache_Control="no-cache, max-age=3600") is None
+        assert fresh_until(Cache_Control="max-age=3600, no-store") is None
+        assert fresh_until(Cache_Control="s-maxage=3600") is None
+        assert fresh_until(Cache_Control="max-age=soon") is None
+        assert fresh_until(Cache_Control="max-age=-5") is None
+        assert fresh_until() is None
+
+        meta = _cache_meta(CaseInsensitiveDict({"etag": '"v1"', "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"}))
+        assert meta == {"etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT", "fresh_until": None}
+
+    def test_fresh_entry_skips_request(self):
+        """Test that a page still fresh per max-age is served without any request."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original_cwd = os.getcwd()
+            try:
+                os.chdir(temp_dir)
+                headers = {"ETag": '"v1"', "Cache-Control": "max-age=3600"}
+                self._fetch(lambda *args, **kwargs: self._response(200, self.HTML, headers))
+
+                article, mock_get = self._fetch(lambda *args, **kwargs: self._response(200, b"", {}))
+                mock_get.assert_not_called()
+                assert article.title == "Cached Title"
+            finally:
+                os.chdir(original_cwd)
+
+    def test_network_failure_without_cache_raises(self):
+        """Test that a failed fetch with nothing cached is still an error."""
+        import requests
+
+        def offline(*args, **kwargs):
+            raise requests.exceptions.ConnectionError("offline")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original_cwd = os.getcwd()
+            try:
+                os.chdir(temp_dir)
+                with pytest.raises(RuntimeError):
+                    self._fetch(offline)
+            finally:
+                os.chdir(original_cwd)
+
+
+class TestSplitCards:
+    """Test parsing of generated card output."""
+
+    def test_split_cards_sections(self):
+        """Test that cards are assigned to the section they follow."""
+        from articles_to_anki.articles import split_cards
+
+        generated = "CLOZE\n{{c1::Paris}} is the capital of France.\n\nBASIC\nWhat is 2 + 2? ; 4\n"
+        cloze_cards, basic_cards = split_cards(generated)
+
+        assert cloze_cards == ["{{c1::Paris}} is the capital of France."]
+        assert basic_cards == ["What is 2 + 2? ; 4"]
+
+    def test_split_cards_ignores_preamble(self):
+        """Test that lines before the first section header are dropped."""
+        from articles_to_anki.articles import split_cards
+
+        cloze_cards, basic_cards = split_cards("Here are your cards:\nbasic\nQ ; A")
+
+        assert cloze_cards == []
+        assert basic_cards == ["Q ; A"]
+
+
+class TestParseCards:
+    """Test parsing of structured JSON card output."""
+
+    def test_json_cards(self):
+        """Test that JSON output becomes cloze cards and "front ; back" basic cards."""
+        from articles_to_anki.articles import parse_cards
+
+        output = '{"cloze": ["{{c1::Paris}} is in France.", "  "], "basic": [{"front": "Q; part", "back": "A"}]}'
+        cloze_cards, basic_cards = parse_cards(output)
+
+        assert cloze_cards == ["{{c1::Paris}} is in France."]
+        assert basic_cards == ["Q, part ; A"]
+
+    def test_json_cards_malformed(self):
+        """Test that malformed JSON, missing keys and wrong types yield no cards instead of failing."""
+        from articles_to_anki.articles import parse_cards
+
+        assert parse_cards('{"cloze": ["unterminated"') == ([], [])
+        assert parse_cards('{}') == ([], [])
+        assert parse_cards('{"cloze": [], "basic": []}') == ([], [])
+        assert parse_cards('{"cloze": null, "basic": "Q ; A"}') == ([], [])
+        assert parse_cards('{"basic": [{"back": "no front"}, "Q ; A", {"front": "Q"}]}') == ([], ["Q ; "])
+
+    def test_text_output_still_parsed(self):
+        """Test that CLOZE/BASIC text output goes through split_cards."""
+        from articles_to_anki.articles import parse_cards
+
+        assert parse_cards("BASIC\nQ ; A") == ([], ["Q ; A"])
+
+
+class TestTokenBudget:
+    """Test token counting, chunking and truncation of long articles."""
+
+    class CharEncoding:
+        """Stands in for a tiktoken encoding with one token per character."""
+
+        def encode(self, text, disallowed_special=()):
+            return list(text)
+
+        def decode(self, tokens):
+            return "".join(tokens)
+
+    def _with_encoding(self):
+        from articles_to_anki import articles
+
+        return patch.multiple(articles, tiktoken=MagicMock(), _token_encoding=MagicMock(return_value=self.CharEncoding()))
+
+    def test_fallback_without_tiktoken(self):
+        """Test the ~4 characters per token estimate used when tiktoken is missing."""
+        from articles_to_anki import articles
+
+        with patch.object(articles, "tiktoken", None):
+            assert articles.count_tokens("") == 0
+            assert articles.count_tokens("abcd") == 1
+            assert articles.count_tokens("abcde") == 2
+
+            text = "x" * 40
+            assert articles.truncate_to_token_budget(text, max_tokens=20) == text
+            assert articles.truncate_to_token_budget(text, max_tokens=10) == text
+            truncated = articles.truncate_to_token_budget("a" * 20 + "b" * 21, max_tokens=10)
+            assert truncated == "a" * 20 + articles._TRUNCATION_MARKER + "b" * 20
+
+    def test_truncate_keeps_head_and_tail(self):
+        """Test truncation at, under and over the budget with an exact tokenizer."""
+        from articles_to_anki import articles
+
+        with self._with_encoding():
+            assert articles.truncate_to_token_budget("abcdef", max_tokens=10) == "abcdef"
+            assert articles.truncate_to_token_budget("abcdef", max_tokens=6) == "abcdef"
+            assert articles.truncate_to_token_budget("abcdefg", max_tokens=6) == "abc" + articles._TRUNCATION_MARKER + "efg"
+
+    def test_chunk_text_boundaries(self):
+        """Test that chunks fill up to the budget and split only where needed."""
+        from articles_to_anki import articles
+
+        with self._with_encoding():
+            assert articles.chunk_text("short", max_tokens=10) == ["short"]
+            # Two 5-token paragraphs exactly fill a 10-token part (newlines aren't counted)
+            assert articles.chunk_text("aaaaa\nbbbbb\nccccc", max_tokens=10) == ["aaaaa\nbbbbb", "ccccc"]
+            # An oversized paragraph is split between sentences; an oversized sentence stays whole
+            assert articles.chunk_text("One two. Three four.", max_tokens=10) == ["One two.", "Three four."]
+            assert articles.chunk_text("a" * 25, max_tokens=10) == ["a" * 25]
+
+    def test_generate_chunked_merges_parts(self):
+        """Test that each part gets its own request and the outputs are merged by one more."""
+        from articles_to_anki import articles
+
+        article = Article(url="https://example.com/long")
+        article.title = "Long"
+        article.text = "aaaaa\nbbbbb\nccccc"
+        calls = []
+
+        def request(messages, model, label):
+            calls.append(messages[-1]["content"])
+            return ["merged"], [], f"CLOZE\noutput {len(calls)}"
+
+        with self._with_encoding():
+            cloze_cards, basic_cards, _ = article._generate_chunked(None, "gpt-4o-mini", 10, request=request)
+            assert len(calls) == 3
+            assert calls[-1].startswith(articles.MERGE_CARDS_PROMPT)
+            assert "aaaaa" not in calls[-1]
+            assert cloze_cards == ["merged"]
+
+            calls.clear()
+            article._generate_chunked(None, "gpt-4o-mini", 100, request=request)
+            assert len(calls) == 1
+            assert calls[0].endswith(article.text)
+
+    def test_generate_chunked_merge_keeps_custom_prompt(self):
+        """Test that the merge request repeats the custom instructions and asks for JSON with --json-output."""
+        from articles_to_anki import articles
+
+        article = Article(url="https://example.com/long")
+        article.title = "Long"
+        article.text = "aaaaa\nbbbbb"
+        calls = []
+
+        def request(messages, model, label):
+            calls.append(messages[-1]["content"])
+            return [], ["Q ; A"], '{"cloze": [], "basic": []}'
+
+        with self._with_encoding():
+            article._generate_chunked("Only BASIC cards.", "gpt-4o-mini", 5, request=request)
+            assert calls[-1].startswith(articles._INSTRUCTIONS_HEADER + "Only BASIC cards.")
+            assert articles.MERGE_CARDS_PROMPT in calls[-1]
+
+            calls.clear()
+            article._generate_chunked("Only BASIC cards.", "gpt-4o-mini", 5, request=request, json_output=True)
+            assert "Only BASIC cards." in calls[-1]
+            assert articles.MERGE_JSON_CARDS_PROMPT in calls[-1]
+            assert "CLOZE section" not in calls[-1]
+
+
+class TestMultiArticleGeneration:
+    """Test splitting one multi-article response back into per-article cards."""
+
+    @staticmethod
+    def _articles(count):
+        articles = []
+        for index in range(count):
+            article = Article(url=f"https://example.com/{index}")
+            article.title = f"Article {index}"
+            article.text = f"Text of article {index}."
+            articles.append(article)
+        return articles
+
+    @staticmethod
+    def _generate(articles, content):
+        from articles_to_anki import articles as articles_module
+
+        client = MagicMock()
+        client.chat.completions.create.return_value = MagicMock(
+            choices=[MagicMock(message=MagicMock(content=content))], usage=None
+        )
+        with patch.object(articles_module, "get_client", return_value=client):
+            results = articles_module.generate_cards_multi(articles)
+        return results, client.chat.completions.create.call_args.kwargs["messages"][-1]["content"]
+
+    def test_output_mapped_by_marker(self):
+        """Test that out-of-order output blocks go to the article their marker names."""
+        articles = self._articles(3)
+        content = (
+            "===OUTPUT 3===\nBASIC\nQ3 ; A3\n"
+            "===OUTPUT 1===\nCLOZE\n{{c1::one}}\n"
+            "=== output 2 ===\nBASIC\nQ2 ; A2\n"
+        )
+        results, prompt = self._generate(articles, content)
+
+        assert "===ARTICLE 1: Article 0===" in prompt
+        assert "===ARTICLE 3: Article 2===" in prompt
+        assert results == {
+            "https://example.com/0": (["{{c1::one}}"], []),
+            "https://example.com/1": ([], ["Q2 ; A2"]),
+            "https://example.com/2": ([], ["Q3 ; A3"]),
+        }
+
+    def test_missing_and_unknown_markers(self):
+        """Test that articles without a block get nothing, and unknown or repeated numbers are ignored."""
+        articles = self._articles(3)
+        content = (
+            "===OUTPUT 2===\nBASIC\nQ2 ; A2\n"
+            "===OUTPUT 7===\nBASIC\nStray ; card\n"
+            "===OUTPUT 2===\nBASIC\nRepeated ; card\n"
+        )
+        results, _ = self._generate(articles, content)
+
+        assert results == {"https://example.com/1": ([], ["Q2 ; A2"])}
+
+    def test_group_articles(self):
+        """Test that groups respect both the article count and the token budget, in order."""
+        from articles_to_anki import articles as articles_module
+
+        articles = self._articles(5)
+        articles[2].text = "x" * 400  # ~100 tokens without tiktoken
+        with patch.object(articles_module, "tiktoken", None):
+            groups = articles_module.group_articles(articles, max_articles=2, max_tokens=50)
+
+        assert [[article.identifier[-1] for article in group] for group in groups] == [["0", "1"], ["2"], ["3", "4"]]
+
+
+class TestBatchGeneration:
+    """Test the OpenAI Batch API path (--batch) against a fake client."""
+
+    @staticmethod
+    def _articles():
+        articles = []
+        for index in range(3):
+            article = Article(url=f"https://example.com/{index}")
+            article.title = f"Article {index}"
+            article.text = f"Text of article {index}."
+            articles.append(article)
+        return articles
+
+    @staticmethod
+    def _client(status, output_lines):
+        import json
+
+        client = MagicMock()
+        client.files.create.return_value = MagicMock(id="file-in")
+        client.batches.create.return_value = MagicMock(id="batch-1", status=status, output_file_id="file-out")
+        client.files.content.return_value = MagicMock(text="\n".join(json.dumps(line) for line in output_lines))
+        return client
+
+    def test_results_mapped_by_custom_id(self):
+        """Test that each request's custom_id maps its output back to the right article."""
+        import json
+        from articles_to_anki import articles as articles_module
+
+        def output(custom_id, content):
+            return {"custom_id": custom_id, "response": {"body": {"choices": [{"message": {"content": content}}]}}}
+
+        # Out of order, and one request failed
+        client = self._client("completed", [
+            output("2", "BASIC\nQ2 ; A2"),
+            {"custom_id": "1", "error": {"message": "boom"}},
+            output("0", "CLOZE\n{{c1::zero}}"),
+        ])
+        articles = self._articles()
+        with patch.object(articles_module, "get_client", return_value=client):
+            results = articles_module.generate_cards_batch(articles, poll_interval=0)
+
+        uploaded = client.files.create.call_args.kwargs["file"][1].decode("utf-8").splitlines()
+        requests = [json.loads(line) for line in uploaded]
+        assert [request["custom_id"] for request in requests] == ["0", "1", "2"]
+        assert "Text of article 2." in requests[2]["body"]["messages"][-1]["content"]
+
+        assert results == {
+            "https://example.com/0": (["{{c1::zero}}"], []),
+            "https://example.com/2": ([], ["Q2 ; A2"]),
+        }
+
+    def test_failed_batch_raises(self):
+        """Test that a batch that doesn't complete is reported as an error."""
+        from articles_to_anki import articles as articles_module
+
+        client = self._client("failed", [])
+        with patch.object(articles_module, "get_client", return_value=client):
+            with pytest.raises(RuntimeError, match="failed"):
+                articles_module.generate_cards_batch(self._articles(), poll_interval=0)
+
+
+class TestGeneratedCache:
+    """Test the exact-match cache of generated output."""
+
+    def test_embeddings_go_through_rate_limits(self):
+        """Test that semantic cache embeddings are paced and retried like chat requests."""
+        from articles_to_anki import card_cache
+
+        client = MagicMock()
+        response = MagicMock(data=[MagicMock(embedding=[3.0, 4.0])])
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                patch.object(card_cache, "get_client", return_value=client), \
+                patch.object(card_cache, "request_limiter") as mock_limiter, \
+                patch.object(card_cache, "call_with_backoff", return_value=response) as mock_backoff:
+            embedding = card_cache.SemanticCardCache(path=os.path.join(temp_dir, "cards.npz")).embed("Article text")
+
+        mock_limiter.acquire.assert_called_once_with(1)
+        assert mock_backoff.call_args.args[0] is client.embeddings.create
+        assert embedding.tolist() == pytest.approx([0.6, 0.8])
+
+    def test_expired_entries_are_misses(self):
+        """Test that entries older than the maximum age are not reused."""
+        from articles_to_anki import card_cache
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch.object(card_cache, "GENERATED_CACHE_DIR", temp_dir):
+                card_cache.save_generated_output("key", "CLOZE\ncard")
+                assert card_cache.load_generated_output("key") == "CLOZE\ncard"
+
+                expired = os.path.getmtime(os.path.join(temp_dir, "key.txt")) - 31 * 86400
+                os.utime(os.path.join(temp_dir, "key.txt"), (expired, expired))
+                assert card_cache.load_generated_output("key") is None
+
+    def test_in_process_memo_is_bounded(self):
+        """Test that only a bounded number of outputs are kept in memory, and the rest come from disk."""
+        from articles_to_anki import card_cache
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch.object(card_cache, "GENERATED_CACHE_DIR", temp_dir):
+                for index in range(card_cache._MAX_RECENT_OUTPUTS + 10):
+                    card_cache.save_generated_output(f"key{index}", f"output {index}")
+
+                assert len(card_cache._recent_outputs) == card_cache._MAX_RECENT_OUTPUTS
+                assert "key0" not in card_cache._recent_outputs
+                assert card_cache.load_generated_output("key0") == "output 0"
+
+
 class TestTextUtils:
     """Test text utility functions."""
 
@@ -172,9 +612,268 @@ class TestExportCards:
                 assert len(cloze_files) > 0
                 assert len(basic_files) > 0
 
+                # The cards must be on disk as soon as export() returns, not only at exit
+                with open(os.path.join("exported_cards", cloze_files[0]), encoding="utf-8") as f:
+                    assert "{{c1::test}} card ; ; Test_Article" in f.read()
+                with open(os.path.join("exported_cards", basic_files[0]), encoding="utf-8") as f:
+                    assert "Question ; Answer ; Test_Article" in f.read()
+
+            finally:
+                os.chdir(original_cwd)
+
+
+class TestAnkiExport:
+    """Test exporting to Anki through a patched AnkiConnect."""
+
+    @staticmethod
+    def _response(body):
+        import json
+
+        response = MagicMock(content=json.dumps(body).encode("utf-8"))
+        response.json.return_value = body
+        response.raise_for_status = MagicMock()
+        return response
+
+    def test_rejected_notes_retried_individually(self):
+        """Test that notes addNotes rejects are resent one by one with addNote."""
+        from articles_to_anki import export_cards
+
+        responses = [
+            self._response({"result": [101, None], "error": None}),
+            self._response({"result": 102, "error": None}),
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original_cwd = os.getcwd()
+            try:
+                os.chdir(temp_dir)
+                exporter = ExportCards(
+                    cloze_cards=["{{c1::Paris}} is the capital of France."],
+                    basic_cards=["What is the capital of Spain? ; Madrid"],
+                    title="Capitals",
+                    deck="Test Deck",
+                    skip_duplicates=False,
+                )
+                with patch.object(export_cards.anki_connect, "post", side_effect=responses) as mock_post:
+                    exporter.export()
             finally:
                 os.chdir(original_cwd)
 
+        actions = [call.args[0]["action"] for call in mock_post.call_args_list]
+        assert actions == ["addNotes", "addNote"]
+        retried = mock_post.call_args_list[1].args[0]["params"]["note"]
+        assert retried["fields"] == {"Front": "What is the capital of Spain?", "Back": "Madrid"}
+        assert exporter.cards_exported == 2
+
+    def test_failed_request_does_not_mark_cards_seen(self):
+        """Test that cards from a request that never reached Anki aren't treated as existing."""
+        import requests
+        from articles_to_anki import export_cards
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original_cwd = os.getcwd()
+            try:
+                os.chdir(temp_dir)
+                exporter = ExportCards(
+                    cloze_cards=["{{c1::Paris}} is the capital of France."],
+                    basic_cards=[],
+                    title="Capitals",
+                    deck="Test Deck",
+                )
+                with patch.object(export_cards.anki_connect, "post", side_effect=requests.exceptions.ConnectionError()):
+                    exporter.export()
+            finally:
+                os.chdir(original_cwd)
+
+        assert exporter.cards_exported == 0
+        assert exporter.existing_cards == []
+
+
+class TestUrlLoading:
+    """Test which URLs the CLI turns into articles."""
+
+    def test_deduplicate_urls(self):
+        """Test that equivalent URLs are kept once, first spelling first, in order."""
+        from articles_to_anki.cli import deduplicate_urls
+
+        urls = [
+            "https://Example.com/post/",
+            "https://example.org/other",
+            "https://example.com/post",
+            "HTTPS://EXAMPLE.COM/post/",
+            "https://example.com/Post",
+            "https://example.com/post?page=2",
+            "https://example.org/other",
+        ]
+        assert deduplicate_urls(urls) == [
+            "https://Example.com/post/",
+            "https://example.org/other",
+            "https://example.com/Post",
+            "https://example.com/post?page=2",
+        ]
+
+    def test_deduplicate_urls_empty(self):
+        """Test that an empty list stays empty."""
+        from articles_to_anki.cli import deduplicate_urls
+
+        assert deduplicate_urls([]) == []
+
+
+class TestProcessedArticles:
+    """Test how the CLI records processed articles."""
+
+    def test_partial_run_records_finished_articles(self):
+        """Test that articles finished before an interruption are saved by the exit hook."""
+        import json
+        import sys
+        from articles_to_anki import cli
+
+        def fetch_content(self, **kwargs):
+            self.title = self.url.rsplit("/", 1)[-1]
+            self.text = f"Text of {self.title}."
+
+        exporter = MagicMock()
+        exporter.return_value.export.side_effect = [None, KeyboardInterrupt()]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original_cwd = os.getcwd()
+            try:
+                os.chdir(temp_dir)
+                os.makedirs("articles")
+                with open(os.path.join("articles", "urls.txt"), "w") as f:
+                    f.write("https://example.com/first\nhttps://example.com/second\n")
+
+                with patch.object(cli, "check_config"), \
+                        patch.object(cli, "check_anki_note_model"), \
+                        patch.object(cli, "ExportCards", exporter), \
+                        patch.object(cli, "atexit") as mock_atexit, \
+                        patch.object(Article, "fetch_content", fetch_content), \
+                        patch.object(Article, "generate_cards", return_value=(["{{c1::card}}"], [])), \
+                        patch.object(sys, "argv", ["articles-to-anki"]):
+                    with pytest.raises(KeyboardInterrupt):
+                        cli.main()
+                    # Nothing is written until the run ends or the exit hook runs
+                    assert not os.path.exists(".processed_articles.json")
+                    flush = mock_atexit.register.call_args.args[0]
+                    flush()
+
+                with open(".processed_articles.json") as f:
+                    processed = json.load(f)
+            finally:
+                os.chdir(original_cwd)
+
+        assert list(processed) == ["https://example.com/first"]
+        assert processed["https://example.com/first"]["deck"] == "Default"
+
+    def test_long_article_in_own_group_is_split(self):
+        """Test that an article grouped alone by --articles-per-request still gets --split-long-articles and --json-output."""
+        import sys
+        from articles_to_anki import cli
+        from articles_to_anki.config import ARTICLE_PART_TOKENS
+
+        def fetch_content(self, **kwargs):
+            self.title = self.url.rsplit("/", 1)[-1]
+            self.text = "x" * 100_000 if self.title == "long" else f"Text of {self.title}."
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original_cwd = os.getcwd()
+            try:
+                os.chdir(temp_dir)
+                os.makedirs("articles")
+                with open(os.path.join("articles", "urls.txt"), "w") as f:
+                    f.write("https://example.com/first\nhttps://example.com/second\nhttps://example.com/long\n")
+
+                with patch.object(cli, "check_config"), \
+                        patch.object(cli, "check_anki_note_model"), \
+                        patch.object(cli, "ExportCards"), \
+                        patch.object(cli, "atexit"), \
+                        patch("articles_to_anki.articles.tiktoken", None), \
+                        patch.object(cli, "generate_cards_multi", return_value={}) as mock_multi, \
+                        patch.object(Article, "fetch_content", fetch_content), \
+                        patch.object(Article, "generate_cards", autospec=True, return_value=([], [])) as mock_generate, \
+                        patch.object(sys, "argv", ["articles-to-anki", "--articles-per-request", "2",
+                                                   "--split-long-articles", "--json-output"]):
+                    cli.main()
+            finally:
+                os.chdir(original_cwd)
+
+        assert [article.title for article in mock_multi.call_args.args[0]] == ["first", "second"]
+        mock_generate.assert_called_once()
+        assert mock_generate.call_args.args[0].title == "long"
+        assert mock_generate.call_args.kwargs["chunk_tokens"] == ARTICLE_PART_TOKENS
+        assert mock_generate.call_args.kwargs["json_output"] is True
+
+
+class TestPipeline:
+    """Test the overlapping fetch/generate pipeline used by the CLI."""
+
+    @staticmethod
+    def _articles(count):
+        return [Article(url=f"https://example.com/{index}") for index in range(count)]
+
+    def test_order_and_bounded_window(self):
+        """Test that results keep input order and no more than max_in_flight articles are pending."""
+        import random
+        import threading
+        import time
+        from articles_to_anki.cli import generate_cards_pipelined
+
+        lock = threading.Lock()
+        state = {"running": 0, "max_running": 0, "taken": 0}
+
+        def fetch(article):
+            with lock:
+                state["running"] += 1
+                state["max_running"] = max(state["max_running"], state["running"])
+            time.sleep(random.random() / 200)
+            with lock:
+                state["running"] -= 1
+            return article
+
+        def generate(article):
+            time.sleep(random.random() / 200)
+            return [article.identifier], []
+
+        def source():
+            for article in self._articles(40):
+                state["taken"] += 1
+                yield article
+
+        yielded = 0
+        order = []
+        for article, (cloze_cards, _) in generate_cards_pipelined(source(), fetch, generate, fetch_workers=3, generation_workers=2, max_in_flight=5):
+            yielded += 1
+            # Articles are only taken from the source while the window has room
+            assert state["taken"] - yielded < 5
+            assert cloze_cards == [article.identifier]
+            order.append(article.identifier)
+
+        assert order == [f"https://example.com/{index}" for index in range(40)]
+        assert state["max_running"] <= 3
+
+    def test_error_cancels_pending_work(self):
+        """Test that an error surfaces to the caller and queued fetches are cancelled."""
+        import time
+        from articles_to_anki.cli import generate_cards_pipelined
+
+        fetched = []
+
+        def fetch(article):
+            time.sleep(0.01)
+            fetched.append(article.identifier)
+            return article
+
+        def generate(article):
+            if article.identifier.endswith("/1"):
+                raise RuntimeError("generation failed")
+            return [], []
+
+        results = generate_cards_pipelined(self._articles(50), fetch, generate, fetch_workers=1, generation_workers=1, max_in_flight=50)
+        next(results)
+        with pytest.raises(RuntimeError, match="generation failed"):
+            next(results)
+        time.sleep(0.05)
+        assert len(fetched) < 50
+
 
 class TestIntegration:
     """Integration tests."""